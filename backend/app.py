@@ -7,6 +7,8 @@ from flask import Flask
 from flask_session import Session
 from config import Config
 from database import init_db
+from services.profiler import init_profiling
+from services.admission import init_admission
 from werkzeug.exceptions import HTTPException
 import logging
 
@@ -20,11 +22,21 @@ Session(app)
 # Initialize database
 init_db()
 
+# Opt-in per-request profiling (admin header or sampled)
+init_profiling(app)
+
+# Per-route-class concurrency limits and queue bounds
+init_admission(app)
+
 # Register blueprints
 from routes.auth import auth_bp
 from routes.quotations import quotations_bp
+from routes.jobs import jobs_bp
+from routes.admin import admin_bp
 app.register_blueprint(auth_bp)
 app.register_blueprint(quotations_bp)
+app.register_blueprint(jobs_bp)
+app.register_blueprint(admin_bp)
 
 
 # Centralized error handlers to return JSON responses
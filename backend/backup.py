@@ -0,0 +1,113 @@
+"""
+Online backups of the live database; safe to run while the app is serving.
+    .\venv\Scripts\python.exe backup.py backup                 # one backup to Config.BACKUP_DIR
+    .\venv\Scripts\python.exe backup.py backup --no-compress
+    .\venv\Scripts\python.exe backup.py list
+    .\venv\Scripts\python.exe backup.py verify backups\quotation-20250101T020000000000.db.gz
+    .\venv\Scripts\python.exe backup.py restore backups\quotation-20250101T020000000000.db.gz --yes
+    .\venv\Scripts\python.exe backup.py schedule --interval-hours 6
+Stop the app and workers before a restore; the current database is backed up first.
+"""
+import argparse
+import sqlite3
+import sys
+import time
+from config import Config
+from services.backup import BackupError, create_backup, list_backups, restore_backup, verify_backup
+
+
+def run_backup(args):
+    try:
+        result = create_backup(dest_dir=args.dir, compress=not args.no_compress)
+    except (BackupError, OSError, sqlite3.Error) as e:
+        print(f"✗ Backup failed: {e}")
+        return 1
+    fallback = ', finished in one step' if result['one_step_fallback'] else ''
+    print(f"✓ {result['path']} ({result['bytes'] / 1024 / 1024:.1f} MiB, {result['pages']} pages, "
+          f"{result['steps']} steps, {result['restarts']} restarts{fallback}, {result['seconds']:.1f}s)")
+    return 0
+
+
+def run_list(args):
+    for backup in list_backups(args.dir):
+        print(f"{backup['created_at']}  {backup['bytes'] / 1024 / 1024:8.1f} MiB  {backup['file']}")
+    return 0
+
+
+def run_verify(args):
+    result = verify_backup(args.path)
+    if not result['ok']:
+        print(f"✗ {args.path}: " + '; '.join(result['integrity']))
+        return 1
+    rows = ', '.join(f'{table} {count}' for table, count in result['rows'].items())
+    print(f"✓ {args.path}: integrity ok ({rows})")
+    return 0
+
+
+def run_restore(args):
+    if not args.yes:
+        print(f"This replaces {Config.DATABASE} with {args.path}. Re-run with --yes to continue.")
+        return 1
+    try:
+        result = restore_backup(args.path, safety_backup=not args.no_safety_backup)
+    except (BackupError, OSError, sqlite3.Error) as e:
+        print(f"✗ Restore failed: {e}")
+        return 1
+    if result['safety_backup']:
+        print(f"✓ Previous database saved as {result['safety_backup']}")
+    print(f"✓ Restored {result['target']} from {result['restored_from']}")
+    return 0
+
+
+def run_schedule(args):
+    interval = args.interval_hours * 3600
+    print(f"✓ Backing up every {args.interval_hours:g}h; press Ctrl+C to stop")
+    try:
+        while True:
+            started = time.monotonic()
+            try:
+                run_backup(args)
+            except Exception as e:
+                # Keep the schedule alive; the next interval tries again
+                print(f"✗ Backup failed: {e}")
+            time.sleep(max(0.0, interval - (time.monotonic() - started)))
+    except KeyboardInterrupt:
+        print("Stopped.")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Online database backups.')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p = sub.add_parser('backup', help='take one backup')
+    p.add_argument('--dir', help=f'output directory (default {Config.BACKUP_DIR})')
+    p.add_argument('--no-compress', action='store_true', help='write a plain .db file')
+    p.set_defaults(func=run_backup)
+
+    p = sub.add_parser('list', help='list stored backups')
+    p.add_argument('--dir')
+    p.set_defaults(func=run_list)
+
+    p = sub.add_parser('verify', help='integrity-check a backup file')
+    p.add_argument('path')
+    p.set_defaults(func=run_verify)
+
+    p = sub.add_parser('restore', help='replace the database with a backup')
+    p.add_argument('path')
+    p.add_argument('--yes', action='store_true', help='confirm the restore')
+    p.add_argument('--no-safety-backup', action='store_true', help='skip backing up the current database')
+    p.set_defaults(func=run_restore)
+
+    p = sub.add_parser('schedule', help='take backups periodically')
+    p.add_argument('--interval-hours', type=float, default=Config.BACKUP_INTERVAL_HOURS)
+    p.add_argument('--dir')
+    p.add_argument('--no-compress', action='store_true')
+    p.set_defaults(func=run_schedule)
+
+    args = parser.parse_args()
+    return args.func(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
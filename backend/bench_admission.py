@@ -0,0 +1,188 @@
+"""
+Load test: read latency under write saturation, with and without admission control.
+Starts the app against a throwaway database on a local server with a fixed pool
+of worker threads (Config.SERVER_THREADS, like a production server), floods
+POST /api/quotations/create from many clients and measures cheap reads
+(/api/auth/me and /api/quotations/categories) at the same time:
+    .\venv\Scripts\python.exe bench_admission.py
+    .\venv\Scripts\python.exe bench_admission.py --writers 64 --seconds 15 --threads 16
+"""
+import argparse
+import http.client
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+ITEMS = [{'part_id': 1 + n % 3, 'qty': 1 + n % 4, 'price': 100.0 + n} for n in range(200)]
+
+
+def request(conn, method, path, body=None, cookie=None):
+    headers = {'Content-Type': 'application/json'}
+    if cookie:
+        headers['Cookie'] = cookie
+    conn.request(method, path, body=json.dumps(body) if body is not None else None, headers=headers)
+    res = conn.getresponse()
+    res.read()
+    return res
+
+
+def login(port, username, password):
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+    res = request(conn, 'POST', '/api/auth/login', {'username': username, 'password': password})
+    return res.getheader('Set-Cookie').split(';')[0]
+
+
+def make_pooled_server(app, threads):
+    """WSGI server that hands each request to a fixed pool of `threads` workers.
+
+    Unlike werkzeug's thread-per-request server, requests beyond the pool
+    wait for a free thread, so requests parked in an admission queue take
+    threads away from everything else, as they do in production.
+    """
+    from werkzeug.serving import BaseWSGIServer
+
+    class PooledWSGIServer(BaseWSGIServer):
+        def __init__(self):
+            super().__init__('127.0.0.1', 0, app)
+            self.pool = ThreadPoolExecutor(max_workers=threads)
+
+        def process_request(self, request, client_address):
+            self.pool.submit(self._handle, request, client_address)
+
+        def _handle(self, request, client_address):
+            try:
+                self.finish_request(request, client_address)
+            except Exception:
+                self.handle_error(request, client_address)
+            finally:
+                self.shutdown_request(request)
+
+    return PooledWSGIServer()
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))] * 1000
+
+
+def measure(args):
+    """Child process: serve the app and run the load against it."""
+    os.environ['DATABASE_PATH'] = os.path.join(tempfile.mkdtemp(prefix='qtn-bench-'), 'bench.db')
+    from config import Config
+    Config.SESSION_FILE_DIR = os.path.join(os.path.dirname(Config.DATABASE), 'flask_session')
+    from db_init import init_database
+    init_database()
+    from app import app
+
+    server = make_pooled_server(app, args.threads)
+    port = server.server_port
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    cookie = login(port, 'staff1', 'staff123')
+
+    stop = time.monotonic() + args.seconds
+    lock = threading.Lock()
+    writes = {'created': 0, 'rejected': 0, 'failed': 0}
+    reads = {'latencies': [], 'rejected': 0, 'failed': 0}
+
+    def writer():
+        conn = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+        while time.monotonic() < stop:
+            try:
+                res = request(conn, 'POST', '/api/quotations/create',
+                              {'customer': 'Load', 'address': 'Kathmandu', 'items': ITEMS}, cookie)
+                key = 'created' if res.status == 201 else 'rejected' if res.status == 503 else 'failed'
+                if res.status == 503:
+                    # Well-behaved client: back off as told
+                    time.sleep(float(res.getheader('Retry-After', 1)))
+            except Exception:
+                conn = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+                key = 'failed'
+            with lock:
+                writes[key] += 1
+
+    def reader():
+        conn = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+        paths = ['/api/auth/me', '/api/quotations/categories']
+        n = 0
+        while time.monotonic() < stop:
+            start = time.perf_counter()
+            try:
+                res = request(conn, 'GET', paths[n % 2], cookie=cookie)
+                status = res.status
+            except Exception:
+                conn = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+                status = None
+            elapsed = time.perf_counter() - start
+            with lock:
+                if status == 200:
+                    reads['latencies'].append(elapsed)
+                elif status == 503:
+                    reads['rejected'] += 1
+                else:
+                    reads['failed'] += 1
+            n += 1
+            time.sleep(0.01)
+
+    threads = [threading.Thread(target=writer) for _ in range(args.writers)]
+    threads += [threading.Thread(target=reader) for _ in range(args.readers)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    server.shutdown()
+    server.pool.shutdown(wait=False, cancel_futures=True)
+
+    lat = reads['latencies']
+    print(json.dumps({
+        'reads': len(lat), 'read_p50_ms': percentile(lat, 50), 'read_p95_ms': percentile(lat, 95),
+        'read_p99_ms': percentile(lat, 99), 'read_rejected': reads['rejected'], 'read_failed': reads['failed'],
+        'writes_per_s': writes['created'] / args.seconds, 'write_rejected': writes['rejected'],
+        'write_failed': writes['failed']
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Admission control load test.')
+    parser.add_argument('--writers', type=int, default=48)
+    parser.add_argument('--readers', type=int, default=4)
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--threads', type=int, default=None, help='server worker threads (default Config.SERVER_THREADS)')
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        measure(args)
+        return
+
+    if args.threads is None:
+        from config import Config
+        args.threads = Config.SERVER_THREADS
+    print(f"{args.writers} writers + {args.readers} readers for {args.seconds:g}s per run, "
+          f"{args.threads} server threads")
+    for enabled in ('0', '1'):
+        env = dict(os.environ, ADMISSION_CONTROL_ENABLED=enabled, PROFILING_ENABLED='0')
+        out = subprocess.run(
+            [sys.executable, __file__, '--child', '--writers', str(args.writers),
+             '--readers', str(args.readers), '--seconds', str(args.seconds), '--threads', str(args.threads)],
+            env=env, capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__))
+        )
+        lines = out.stdout.strip().splitlines()
+        if out.returncode != 0 or not lines:
+            print(out.stdout, out.stderr)
+            continue
+        r = json.loads(lines[-1])
+        label = 'admission control' if enabled == '1' else 'no admission control'
+        print(f"{label:>21}: reads p50 {r['read_p50_ms']:7.1f} ms  p95 {r['read_p95_ms']:7.1f} ms  "
+              f"p99 {r['read_p99_ms']:7.1f} ms  ({r['reads']} ok, {r['read_rejected']} rejected, "
+              f"{r['read_failed']} failed) | writes {r['writes_per_s']:6.1f}/s, "
+              f"{r['write_rejected']} rejected, {r['write_failed']} failed")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,143 @@
+"""
+Measure quotation-create latency while an online backup runs.
+Seeds a throwaway database, keeps writer threads creating quotations, and
+compares write latency with no backup, during a paced backup (Config
+defaults) and during an unpaced single-step backup:
+    .\venv\Scripts\python.exe bench_backup.py
+    .\venv\Scripts\python.exe bench_backup.py --single-writer
+    .\venv\Scripts\python.exe bench_backup.py --quotations 20000 --journal-mode delete
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+parser = argparse.ArgumentParser(description='Write latency during online backups.')
+parser.add_argument('--quotations', type=int, default=60000, help='seeded quotations (20 lines each)')
+parser.add_argument('--threads', type=int, default=4)
+parser.add_argument('--idle-seconds', type=float, default=3)
+parser.add_argument('--journal-mode', default=None, help='override Config.SQLITE_JOURNAL_MODE')
+parser.add_argument('--single-writer', action='store_true', help='enable SINGLE_WRITER_MODE group commit')
+args = parser.parse_args()
+
+os.environ['DATABASE_PATH'] = os.path.join(tempfile.mkdtemp(prefix='qtn-bench-'), 'bench.db')
+if args.journal_mode:
+    os.environ['SQLITE_JOURNAL_MODE'] = args.journal_mode
+
+from config import Config  # noqa: E402
+from database import engine  # noqa: E402
+from db_init import init_database  # noqa: E402
+from models import Quotation, QuotationItem  # noqa: E402
+from services.backup import create_backup, verify_backup  # noqa: E402
+from services.quote_service import normalize_quotation_items, create_quotation_record  # noqa: E402
+from services import write_queue  # noqa: E402
+
+LINES, SUBTOTAL = normalize_quotation_items([
+    {'part_id': 1, 'qty': 2, 'price': 1200.0},
+    {'part_id': 2, 'qty': 1, 'price': 7500.0},
+])
+
+SEED_DATE = datetime(2024, 1, 1)
+
+
+def seed(count):
+    with engine.begin() as conn:
+        for start in range(0, count, 1000):
+            ids = range(start + 1, min(count, start + 1000) + 1)
+            conn.execute(Quotation.__table__.insert(), [
+                {'id': i, 'quote_no': f'SEED/{i:06d}', 'customer': f'Customer {i}', 'address': 'Kathmandu',
+                 'date': SEED_DATE, 'labour': 0.0, 'discount_percent': 0.0, 'total': 0.0, 'created_by': 'staff1'}
+                for i in ids
+            ])
+            conn.execute(QuotationItem.__table__.insert(), [
+                {'quotation_id': i, 'part_id': 1 + n % 3, 'qty': 1 + n, 'price': 100.0 * n}
+                for i in ids for n in range(20)
+            ])
+
+
+class Writers:
+    """Threads creating quotations; latencies are collected per phase."""
+
+    def __init__(self, threads):
+        self.phase = None
+        self.latencies = {}
+        self.errors = 0
+        self.stop = threading.Event()
+        self.lock = threading.Lock()
+        self.threads = [threading.Thread(target=self.run, args=(n,)) for n in range(threads)]
+        for t in self.threads:
+            t.start()
+
+    def run(self, n):
+        i = 0
+        while not self.stop.is_set():
+            phase = self.phase
+            start = time.perf_counter()
+            try:
+                write_queue.run_write(lambda db: create_quotation_record(
+                    db, 'staff1', f'Load {n}-{i}', 'Kathmandu', LINES, SUBTOTAL, 0.0
+                ))
+            except Exception:
+                with self.lock:
+                    self.errors += 1
+                continue
+            with self.lock:
+                self.latencies.setdefault(phase, []).append(time.perf_counter() - start)
+            i += 1
+            time.sleep(0.002)
+
+    def finish(self):
+        self.stop.set()
+        for t in self.threads:
+            t.join()
+
+
+def report(label, latencies, extra=''):
+    latencies = sorted(latencies)
+    if not latencies:
+        print(f"{label:>22}: no writes completed {extra}")
+        return
+
+    def pct(p):
+        return latencies[min(len(latencies) - 1, int(len(latencies) * p / 100))] * 1000
+    print(f"{label:>22}: {len(latencies):6d} writes  p50 {pct(50):6.1f} ms  p95 {pct(95):6.1f} ms  "
+          f"p99 {pct(99):6.1f} ms  max {latencies[-1] * 1000:7.1f} ms  {extra}")
+
+
+def main():
+    Config.SINGLE_WRITER_MODE = args.single_writer
+    init_database()
+    seed(args.quotations)
+    size = os.path.getsize(Config.DATABASE) / 1024 / 1024
+    backup_dir = tempfile.mkdtemp(prefix='qtn-backups-')
+    print(f"{size:.1f} MiB database, journal_mode={Config.SQLITE_JOURNAL_MODE}, {args.threads} writer threads, "
+          f"{'single-writer' if args.single_writer else 'per-request commit'}")
+
+    writers = Writers(args.threads)
+    results = {}
+    try:
+        writers.phase = 'idle'
+        time.sleep(args.idle_seconds)
+        for phase, pages, pause in (('paced backup', None, None), ('single-step backup', -1, 0)):
+            writers.phase = phase
+            results[phase] = create_backup(dest_dir=backup_dir, compress=False, pages=pages, pause=pause)
+            writers.phase = None
+    finally:
+        writers.finish()
+
+    report('no backup', writers.latencies.get('idle', []))
+    for phase, result in results.items():
+        fallback = ', one-step fallback' if result['one_step_fallback'] else ''
+        report(phase, writers.latencies.get(phase, []),
+               f"(backup {result['seconds']:.2f}s, {result['steps']} steps, {result['restarts']} restarts{fallback})")
+    print(f"write errors: {writers.errors}")
+    verified = verify_backup(results['paced backup']['path'])
+    print(f"paced backup integrity: {'ok' if verified['ok'] else verified['integrity']}")
+    return 0 if verified['ok'] and not writers.errors else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
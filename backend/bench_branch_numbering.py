@@ -0,0 +1,120 @@
+"""
+Benchmark concurrent quotation creates spread over one branch vs several branches,
+and check that every branch's quote series has no gaps or duplicates.
+Uses a throwaway database per run, so it is safe to run next to a live quotation.db:
+    .\venv\Scripts\python.exe bench_branch_numbering.py
+    .\venv\Scripts\python.exe bench_branch_numbering.py --branches 8 --threads 16 --creates 50
+"""
+import argparse
+import os
+import tempfile
+import threading
+import time
+
+os.environ['DATABASE_PATH'] = os.path.join(tempfile.mkdtemp(prefix='qtn-bench-'), 'bench.db')
+
+from config import Config  # noqa: E402
+from database import get_db_session  # noqa: E402
+from db_init import init_database  # noqa: E402
+from models import Branch, Quotation  # noqa: E402
+from services.quote_service import normalize_quotation_items, create_quotation_record  # noqa: E402
+from services import write_queue  # noqa: E402
+
+ITEMS = [
+    {'part_id': 1, 'qty': 2, 'price': 1200.0},
+    {'part_id': 2, 'qty': 1, 'price': 7500.0},
+]
+LINES, SUBTOTAL = normalize_quotation_items(ITEMS)
+
+
+def add_branches(count):
+    codes = [Config.DEFAULT_BRANCH] + [f'BR{n:02d}' for n in range(1, count)]
+    db = get_db_session()
+    try:
+        for code in codes[1:]:
+            if not db.query(Branch.id).filter_by(code=code).first():
+                db.add(Branch(code=code, name=f'Branch {code}', pad_width=4))
+        db.commit()
+    finally:
+        db.close()
+    return codes
+
+
+def check_series(codes):
+    """Return a list of problems: duplicate numbers or gaps in a branch's sequence."""
+    db = get_db_session()
+    try:
+        rows = db.query(Quotation.branch_code, Quotation.quote_no).all()
+    finally:
+        db.close()
+    problems = []
+    for code in codes:
+        seqs = sorted(int(no.rsplit('/', 1)[1]) for branch, no in rows if branch == code)
+        if seqs != list(range(1, len(seqs) + 1)):
+            problems.append(f'{code}: sequence is not 1..{len(seqs)}')
+    if len({no for _, no in rows}) != len(rows):
+        problems.append('duplicate quote numbers')
+    return problems
+
+
+def run(label, codes, threads, creates):
+    errors = []
+    latencies = []
+    lock = threading.Lock()
+
+    def client(n):
+        branch = codes[n % len(codes)]
+        for i in range(creates):
+            start = time.perf_counter()
+            try:
+                write_queue.run_write(lambda db: create_quotation_record(
+                    db, 'staff1', f'Customer {n}-{i}', 'Kathmandu', LINES, SUBTOTAL, 0.0, branch_code=branch
+                ))
+            except Exception as e:
+                with lock:
+                    errors.append(str(e))
+                continue
+            with lock:
+                latencies.append(time.perf_counter() - start)
+
+    workers = [threading.Thread(target=client, args=(n,)) for n in range(threads)]
+    start = time.perf_counter()
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    p95 = latencies[int(len(latencies) * 0.95) - 1] * 1000 if latencies else 0.0
+    print(f"{label:>12}: {len(latencies) / elapsed:8.1f} creates/s  "
+          f"p95 {p95:7.1f} ms  errors {len(errors)}")
+    for error in sorted(set(errors))[:3]:
+        print(f"              {error}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Multi-branch quote numbering benchmark.')
+    parser.add_argument('--branches', type=int, default=4)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--creates', type=int, default=50, help='creates per thread')
+    parser.add_argument('--single-writer', action='store_true', help='enable SINGLE_WRITER_MODE group commit')
+    args = parser.parse_args()
+
+    Config.SINGLE_WRITER_MODE = args.single_writer
+    init_database()
+    codes = add_branches(args.branches)
+    print(f"{args.threads} threads x {args.creates} creates, "
+          f"{'single-writer' if args.single_writer else 'per-request commit'}")
+    run('1 branch', codes[:1], args.threads, args.creates)
+    run(f'{len(codes)} branches', codes, args.threads, args.creates)
+
+    problems = check_series(codes)
+    for problem in problems:
+        print(f'✗ {problem}')
+    if not problems:
+        print(f'✓ {len(codes)} branch series are gap-free with no duplicate numbers')
+
+
+if __name__ == '__main__':
+    main()
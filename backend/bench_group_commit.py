@@ -0,0 +1,80 @@
+"""
+Benchmark quotation creates per second with and without single-writer group commit.
+Uses a throwaway database, so it is safe to run next to a live quotation.db:
+    .\venv\Scripts\python.exe bench_group_commit.py
+    .\venv\Scripts\python.exe bench_group_commit.py --threads 16 --creates 100
+"""
+import argparse
+import os
+import tempfile
+import threading
+import time
+
+os.environ['DATABASE_PATH'] = os.path.join(tempfile.mkdtemp(prefix='qtn-bench-'), 'bench.db')
+
+from config import Config  # noqa: E402
+from db_init import init_database  # noqa: E402
+from services.quote_service import normalize_quotation_items, create_quotation_record  # noqa: E402
+from services import write_queue  # noqa: E402
+
+ITEMS = [
+    {'part_id': 1, 'qty': 2, 'price': 1200.0},
+    {'part_id': 2, 'qty': 1, 'price': 7500.0},
+    {'part_no': 'CUST-1', 'part_name': 'Custom gasket', 'qty': 4, 'price': 150.0},
+]
+LINES, SUBTOTAL = normalize_quotation_items(ITEMS)
+
+
+def run(threads, creates, single_writer):
+    Config.SINGLE_WRITER_MODE = single_writer
+    errors = []
+    latencies = []
+    lock = threading.Lock()
+
+    def client(n):
+        for i in range(creates):
+            start = time.perf_counter()
+            try:
+                write_queue.run_write(lambda db: create_quotation_record(
+                    db, 'staff1', f'Customer {n}-{i}', 'Kathmandu', LINES, SUBTOTAL, 10.0
+                ))
+            except Exception as e:
+                with lock:
+                    errors.append(str(e))
+                continue
+            with lock:
+                latencies.append(time.perf_counter() - start)
+
+    workers = [threading.Thread(target=client, args=(n,)) for n in range(threads)]
+    start = time.perf_counter()
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    p95 = latencies[int(len(latencies) * 0.95) - 1] * 1000 if latencies else 0.0
+    mode = 'single-writer' if single_writer else 'per-request commit'
+    print(f"{mode:>20}: {len(latencies) / elapsed:8.1f} creates/s  "
+          f"p95 {p95:7.1f} ms  errors {len(errors)}")
+    if errors:
+        print(f"{'':>22}first error: {errors[0]}")
+    if single_writer:
+        print(f"{'':>22}writer stats: {write_queue.get_writer().stats()}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark group commit.')
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--creates', type=int, default=50, help='creates per thread')
+    args = parser.parse_args()
+
+    init_database()
+    print(f"\n{args.threads} threads x {args.creates} creates on {Config.DATABASE}")
+    run(args.threads, args.creates, single_writer=False)
+    run(args.threads, args.creates, single_writer=True)
+
+
+if __name__ == '__main__':
+    main()
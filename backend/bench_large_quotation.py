@@ -0,0 +1,114 @@
+"""
+Benchmark creating and reading a very large quotation (default 5,000 lines).
+Compares the previous per-object ORM insert with the validated bulk-insert
+path, and the in-memory detail payload with the streamed detail response.
+Uses a throwaway database:
+    .\venv\Scripts\python.exe bench_large_quotation.py
+    .\venv\Scripts\python.exe bench_large_quotation.py --lines 20000
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+
+os.environ['DATABASE_PATH'] = os.path.join(tempfile.mkdtemp(prefix='qtn-bench-'), 'bench.db')
+
+from config import Config  # noqa: E402
+Config.SESSION_FILE_DIR = os.path.join(os.path.dirname(Config.DATABASE), 'flask_session')
+from db_init import init_database  # noqa: E402
+from database import engine  # noqa: E402
+from models import Part, Quotation, QuotationItem  # noqa: E402
+from services.write_queue import run_write  # noqa: E402
+from services.quote_service import (  # noqa: E402
+    normalize_quotation_items,
+    create_quotation_record,
+    generate_quote_number,
+    build_quotation_detail,
+)
+from database import get_db_session  # noqa: E402
+from app import app  # noqa: E402
+
+
+def seed_parts(count):
+    rows = [
+        {'part_no': f'EP-{n:06d}', 'part_name': f'Engine part {n}', 'price': 100.0 + n % 900}
+        for n in range(count)
+    ]
+    with engine.begin() as conn:
+        conn.execute(Part.__table__.insert(), rows)
+
+
+def legacy_create(db, items):
+    """The create path before bulk insert: two Python loops, one ORM object per line."""
+    subtotal = sum(float(item.get('qty', 0)) * float(item.get('price', 0)) for item in items)
+    quotation = Quotation(quote_no=generate_quote_number(db), customer='Legacy', address='Kathmandu',
+                          total=round(subtotal * 1.13, 2), created_by='staff1')
+    db.add(quotation)
+    db.flush()
+    for item in items:
+        db.add(QuotationItem(quotation_id=quotation.id, part_id=item.get('part_id'),
+                             qty=float(item.get('qty', 0)), price=float(item.get('price', 0)),
+                             part_no=item.get('part_no'), part_name=item.get('part_name')))
+    return quotation.id
+
+
+def timed(label, fn):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"  {label:<34}: {elapsed * 1000:8.1f} ms  peak {peak / 1024 / 1024:6.1f} MiB")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark very large quotations.')
+    parser.add_argument('--lines', type=int, default=5000)
+    parser.add_argument('--parts', type=int, default=10000, help='catalog size')
+    args = parser.parse_args()
+
+    init_database()
+    seed_parts(args.parts)
+    random.seed(1)
+    items = []
+    for n in range(args.lines):
+        if n % 10 == 0:
+            items.append({'part_no': f'CUST-{n}', 'part_name': f'Custom part {n}', 'qty': 1, 'price': 250.0})
+        else:
+            items.append({'part_id': random.randint(4, args.parts + 3), 'qty': random.randint(1, 4),
+                          'price': 100.0 + random.random() * 900})
+
+    print(f"\nQuotation with {args.lines} lines")
+    timed('create (per-object ORM add)', lambda: run_write(lambda db: legacy_create(db, items)))
+
+    def create():
+        lines, subtotal = normalize_quotation_items(items)
+        return run_write(lambda db: create_quotation_record(db, 'staff1', 'Bulk', 'Kathmandu', lines, subtotal, 0.0))
+    qid = timed('create (validated bulk insert)', create)['id']
+
+    def build():
+        db = get_db_session()
+        try:
+            return app.json.dumps(build_quotation_detail(db, qid))
+        finally:
+            db.close()
+    timed('detail (built in memory)', build)
+
+    client = app.test_client()
+    client.post('/api/auth/login', json={'username': 'staff1', 'password': 'staff123'})
+
+    def stream():
+        res = client.get(f'/api/quotations/{qid}', buffered=False)
+        size = sum(len(chunk) for chunk in res.response)
+        res.close()
+        return size
+    size = timed('detail (streamed route)', stream)
+    print(f"  streamed payload {size / 1024:.0f} KiB")
+
+
+if __name__ == '__main__':
+    main()
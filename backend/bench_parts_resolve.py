@@ -0,0 +1,81 @@
+"""
+Benchmark POST /api/quotations/parts/resolve against per-part /parts/search calls.
+Uses a throwaway database seeded with a large parts catalog:
+    .\venv\Scripts\python.exe bench_parts_resolve.py
+    .\venv\Scripts\python.exe bench_parts_resolve.py --parts 50000 --bom 1000
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+os.environ['DATABASE_PATH'] = os.path.join(tempfile.mkdtemp(prefix='qtn-bench-'), 'bench.db')
+
+from config import Config  # noqa: E402
+Config.SESSION_FILE_DIR = os.path.join(os.path.dirname(Config.DATABASE), 'flask_session')
+from db_init import init_database  # noqa: E402
+from database import engine  # noqa: E402
+from models import Part  # noqa: E402
+from app import app  # noqa: E402
+
+
+def seed_parts(count):
+    rows = [
+        {'part_no': f'EP-{n:06d}', 'part_name': f'Engine part {n}', 'price': 100.0 + n % 900}
+        for n in range(count)
+    ]
+    with engine.begin() as conn:
+        conn.execute(Part.__table__.insert(), rows)
+
+
+def make_bom(catalog_size, size, miss_ratio=0.1):
+    bom = []
+    for _ in range(size):
+        n = random.randrange(catalog_size)
+        if random.random() < miss_ratio:
+            # Typo-style miss: lowercase and drop the dash
+            bom.append({'part_no': f'ep{n:06d}x', 'qty': random.randint(1, 5)})
+        else:
+            bom.append({'part_no': f'EP-{n:06d}', 'qty': random.randint(1, 5)})
+    return bom
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark batch part resolution.')
+    parser.add_argument('--parts', type=int, default=20000, help='catalog size')
+    parser.add_argument('--bom', type=int, default=1000, help='part numbers per request')
+    parser.add_argument('--rounds', type=int, default=5)
+    args = parser.parse_args()
+
+    init_database()
+    seed_parts(args.parts)
+    random.seed(1)
+    client = app.test_client()
+    client.post('/api/auth/login', json={'username': 'staff1', 'password': 'staff123'})
+
+    print(f"\nCatalog {args.parts} parts, BOM of {args.bom} part numbers")
+    timings = []
+    for _ in range(args.rounds):
+        bom = make_bom(args.parts, args.bom)
+        start = time.perf_counter()
+        res = client.post('/api/quotations/parts/resolve', json={'items': bom})
+        timings.append(time.perf_counter() - start)
+        assert res.status_code == 200, res.json
+    body = res.json
+    print(f"  resolve endpoint : {min(timings) * 1000:8.1f} ms best, "
+          f"{sum(timings) / len(timings) * 1000:8.1f} ms avg "
+          f"({len(body['parts'])} matched, {len(body['missing'])} missing)")
+
+    # Baseline: what the UI does today, one search call per part number
+    sample = make_bom(args.parts, min(args.bom, 100))
+    start = time.perf_counter()
+    for entry in sample:
+        client.get('/api/quotations/parts/search', query_string={'q': entry['part_no']})
+    per_part = (time.perf_counter() - start) / len(sample)
+    print(f"  per-part search  : {per_part * args.bom * 1000:8.1f} ms estimated for {args.bom} "
+          f"({per_part * 1000:.2f} ms per call over {len(sample)} calls)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+"""
+Benchmark onboarding staff: one create per user (as POST /api/auth/users does)
+vs the bulk import with 1 and USER_IMPORT_HASH_WORKERS hashing threads.
+Uses a throwaway database, so it is safe to run next to a live quotation.db:
+    .\venv\Scripts\python.exe bench_user_import.py
+    .\venv\Scripts\python.exe bench_user_import.py --users 500
+"""
+import argparse
+import os
+import tempfile
+import time
+
+os.environ['DATABASE_PATH'] = os.path.join(tempfile.mkdtemp(prefix='qtn-bench-'), 'bench.db')
+
+from werkzeug.security import generate_password_hash  # noqa: E402
+from config import Config  # noqa: E402
+from db_init import init_database  # noqa: E402
+from models import User  # noqa: E402
+from services.user_import import import_users  # noqa: E402
+from services.write_queue import run_write  # noqa: E402
+
+
+def rows(prefix, count):
+    return [{'username': f'{prefix}{n:05d}', 'password': f'initial-{n}', 'role': 'staff'} for n in range(count)]
+
+
+def one_by_one(batch):
+    start = time.perf_counter()
+    for row in batch:
+        password_hash = generate_password_hash(row['password'])
+
+        def write(db, row=row, password_hash=password_hash):
+            if not db.query(User).filter_by(username=row['username']).first():
+                db.add(User(username=row['username'], password_hash=password_hash, role=row['role']))
+        run_write(write)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Bulk staff import benchmark.')
+    parser.add_argument('--users', type=int, default=300)
+    args = parser.parse_args()
+    init_database()
+    workers = Config.USER_IMPORT_HASH_WORKERS
+
+    seconds = one_by_one(rows('single', args.users))
+    print(f"{'one request per user':>26}: {args.users / seconds:7.1f} users/s  ({seconds:.2f}s)")
+
+    runs = [('bulk, 1 hash thread', 1)]
+    if workers > 1:
+        runs.append((f'bulk, {workers} hash threads', workers))
+    for n, (label, hash_workers) in enumerate(runs):
+        Config.USER_IMPORT_HASH_WORKERS = hash_workers
+        result = import_users(rows(f'bulk{n}-', args.users))
+        print(f"{label:>26}: {result['users_per_second']:7.1f} users/s  ({result['seconds']:.2f}s: "
+              f"hash {result['hash_seconds']:.2f}s, insert {result['insert_seconds']:.2f}s, "
+              f"{result['created']} created, {result['failed']} failed)")
+
+
+if __name__ == '__main__':
+    main()
@@ -8,6 +8,83 @@ class Config:
     """Base configuration."""
     DEBUG = True
     SECRET_KEY = os.environ.get('SECRET_KEY', 'dev-secret-key-change-in-production')
-    DATABASE = os.path.join(os.path.dirname(__file__), 'quotation.db')
+    DATABASE = os.environ.get('DATABASE_PATH', os.path.join(os.path.dirname(__file__), 'quotation.db'))
+    # WAL lets readers (including online backups, see services/backup.py) run
+    # alongside the writer; 'delete' restores SQLite's rollback-journal default.
+    SQLITE_JOURNAL_MODE = os.environ.get('SQLITE_JOURNAL_MODE', 'wal')
     SESSION_TYPE = 'filesystem'
     PERMANENT_SESSION_LIFETIME = 86400  # 24 hours
+
+    # Background job queue (see services/job_queue.py and worker.py)
+    JOB_WORKER_PROCESSES = int(os.environ.get('JOB_WORKER_PROCESSES', 2))
+    JOB_POLL_INTERVAL = 1.0  # seconds between polls when the queue is empty
+    JOB_LEASE_SECONDS = 300  # running jobs whose lease expires are re-queued
+    JOB_RETRY_BACKOFF = 5  # seconds before the first retry, doubled per attempt
+
+    # Single-writer mode (see services/write_queue.py): route writes through one
+    # thread that group-commits them instead of each request committing alone.
+    SINGLE_WRITER_MODE = os.environ.get('SINGLE_WRITER_MODE', '0') == '1'
+    GROUP_COMMIT_WINDOW_MS = 5  # max time the writer waits to fill a batch
+    GROUP_COMMIT_MAX_BATCH = 64  # max write requests per commit
+
+    # Quotation detail cache (see services/detail_cache.py)
+    DETAIL_CACHE_MAX_BYTES = int(os.environ.get('DETAIL_CACHE_MAX_BYTES', 32 * 1024 * 1024))
+    DETAIL_CACHE_DIR = os.environ.get('DETAIL_CACHE_DIR')  # optional on-disk tier; None disables it
+    DETAIL_CACHE_EPOCH_CHECK = 1.0  # seconds between checks for invalidations from other processes
+
+    # Batch part-number resolution (POST /api/quotations/parts/resolve)
+    PARTS_RESOLVE_MAX_ITEMS = 5000
+
+    # Large quotations
+    QUOTATION_MAX_ITEMS = 20000  # lines accepted by POST /api/quotations/create
+    QUOTATION_STREAM_THRESHOLD = 1000  # detail responses above this many lines are streamed
+
+    # Request profiling hooks (see services/profiler.py); set PROFILING_ENABLED=1 to allow
+    # admins to profile requests with X-Profile or sampling
+    PROFILING_ENABLED = os.environ.get('PROFILING_ENABLED', '0') == '1'
+    PROFILE_SAMPLE_PERCENT = float(os.environ.get('PROFILE_SAMPLE_PERCENT', 0))
+    PROFILE_DIR = os.environ.get('PROFILE_DIR', os.path.join(os.path.dirname(__file__), 'profiles'))
+    PROFILE_RETENTION = 50  # newest reports kept
+    PROFILE_TOP_FUNCTIONS = 40  # functions listed in a report's call stats
+
+    # Catalog delta sync (GET /api/quotations/catalog/changes)
+    CATALOG_CHANGES_PAGE_SIZE = 1000  # max change-log entries per response
+
+    # Admission control per route class (see services/admission.py). Requests beyond
+    # `concurrency` wait in a queue of `queue` entries for up to `timeout` seconds;
+    # when the queue is full or the wait expires they get 503 with Retry-After.
+    # A queued request holds a server thread while it waits, so keep the sum of
+    # concurrency + queue over all classes below SERVER_THREADS, the worker thread
+    # count of the WSGI server (e.g. waitress --threads), leaving room for ungated routes.
+    SERVER_THREADS = int(os.environ.get('SERVER_THREADS', 32))
+    ADMISSION_CONTROL_ENABLED = os.environ.get('ADMISSION_CONTROL_ENABLED', '1') == '1'
+    ADMISSION_LIMITS = {  # 24 threads in total; the other 8 serve ungated routes
+        'auth': {'concurrency': 2, 'queue': 2, 'timeout': 5.0},
+        'catalog_read': {'concurrency': 6, 'queue': 6, 'timeout': 2.0},
+        'quotation_write': {'concurrency': 2, 'queue': 2, 'timeout': 10.0},
+        'admin': {'concurrency': 1, 'queue': 1, 'timeout': 10.0},
+        'export': {'concurrency': 1, 'queue': 1, 'timeout': 30.0},
+    }
+    ADMISSION_RETRY_AFTER = 2  # seconds, sent in the Retry-After header of 503 responses
+
+    # Quote numbering. Each branch has its own yearly counter; a Branch row may
+    # override the format and pad width. Placeholders: {branch}, {year}, {seq}.
+    DEFAULT_BRANCH = os.environ.get('DEFAULT_BRANCH', 'TEST')  # used for users without a branch
+    QUOTE_NUMBER_FORMAT = 'QTN/{branch}/{year}/{seq}'
+    QUOTE_NUMBER_PAD = 3
+
+    # Online backups (see services/backup.py and backup.py)
+    BACKUP_DIR = os.environ.get('BACKUP_DIR', os.path.join(os.path.dirname(__file__), 'backups'))
+    BACKUP_PAGES_PER_STEP = 256  # pages copied per step (1 MiB with 4 KiB pages)
+    BACKUP_STEP_PAUSE = 0.005  # seconds slept between steps so writers get the file
+    BACKUP_MAX_RESTARTS = 3  # rollback-journal mode only: then finish in one step
+    BACKUP_COMPRESS = True  # gzip the backup file
+    BACKUP_RETENTION = 14  # newest backups kept
+    BACKUP_INTERVAL_HOURS = 24  # `backup.py schedule` default interval
+
+    # User directory and bulk staff import (GET /api/auth/users, POST /api/auth/users/bulk)
+    USERS_PAGE_SIZE = 50  # default per_page of the user listing
+    USERS_PAGE_MAX = 500  # largest per_page accepted
+    USER_IMPORT_MAX_ROWS = 2000  # rows accepted per bulk import request
+    USER_IMPORT_CHUNK = 200  # users inserted per transaction
+    USER_IMPORT_HASH_WORKERS = min(8, os.cpu_count() or 4)  # threads hashing initial passwords
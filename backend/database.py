@@ -1,16 +1,47 @@
 """
 Database initialization and session management.
 """
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker
 from models import Base
 from config import Config
+import services.catalog_sync  # noqa: F401  (records Engine/Part/EnginePart writes in catalog_changes)
+
+# Max values per `IN (...)` list: below the 999 bound-parameter limit of older SQLite builds
+IN_CHUNK_SIZE = 900
 
 # Create SQLite engine
 engine = create_engine(f'sqlite:///{Config.DATABASE}', connect_args={"check_same_thread": False})
 
+
+# pysqlite issues its own BEGIN lazily, which breaks SAVEPOINT handling.
+# Let SQLAlchemy manage transactions so nested transactions (used by the
+# group-commit writer in services/write_queue.py) work correctly.
+@event.listens_for(engine, "connect")
+def _disable_pysqlite_transactions(dbapi_connection, connection_record):
+    dbapi_connection.isolation_level = None
+
+
+@event.listens_for(engine, "connect")
+def _set_journal_mode(dbapi_connection, connection_record):
+    # Persistent in the database file; repeating it on connect is a no-op
+    dbapi_connection.execute(f"PRAGMA journal_mode={Config.SQLITE_JOURNAL_MODE}")
+
+
+@event.listens_for(engine, "begin")
+def _emit_begin(conn):
+    # Write sessions take the write lock up front: a deferred transaction that
+    # reads first and then writes can fail with "database is locked" instead
+    # of waiting for the lock.
+    if conn.get_execution_options().get('begin_immediate'):
+        conn.exec_driver_sql("BEGIN IMMEDIATE")
+    else:
+        conn.exec_driver_sql("BEGIN")
+
+
 # Create sessionmaker
 SessionLocal = sessionmaker(bind=engine)
+WriteSessionLocal = sessionmaker(bind=engine.execution_options(begin_immediate=True))
 
 def init_db():
     """Create all tables if they don't exist."""
@@ -19,3 +50,7 @@ def init_db():
 def get_db_session():
     """Get a new database session."""
     return SessionLocal()
+
+def get_write_session():
+    """Get a session whose transaction starts with BEGIN IMMEDIATE."""
+    return WriteSessionLocal()
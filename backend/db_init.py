@@ -5,7 +5,8 @@ Run this script once to bootstrap the database:
     .\venv\Scripts\python.exe db_init.py
 """
 from database import init_db, get_db_session
-from models import User, Engine, Part, EnginePart
+from config import Config
+from models import User, Branch, Engine, Part, EnginePart
 from werkzeug.security import generate_password_hash
 
 def init_database():
@@ -22,20 +23,26 @@ def init_database():
             print("✓ Database already seeded; skipping data insertion")
             return
         
+        # Insert the default branch (its quote series is QTN/<DEFAULT_BRANCH>/YYYY/INC)
+        session.add(Branch(code=Config.DEFAULT_BRANCH, name='Head Office'))
+        session.flush()
+        
         # Insert sample users
         admin_user = User(
             username='admin',
             password_hash=generate_password_hash('admin123'),
-            role='admin'
+            role='admin',
+            branch_code=Config.DEFAULT_BRANCH
         )
         staff_user = User(
             username='staff1',
             password_hash=generate_password_hash('staff123'),
-            role='staff'
+            role='staff',
+            branch_code=Config.DEFAULT_BRANCH
         )
         session.add(admin_user)
         session.add(staff_user)
-        print("✓ Inserted 2 users (admin, staff1)")
+        print(f"✓ Inserted branch {Config.DEFAULT_BRANCH} and 2 users (admin, staff1)")
         
         # Insert engines (categories and hierarchical models)
         # Top-level product lines for Industrial Engine
@@ -0,0 +1,67 @@
+"""
+Migration script to add branches: the `branches` table, plus a `branch_code`
+column on `users` and `quotations`. Existing users and quotations are
+assigned to the default branch (Config.DEFAULT_BRANCH), whose quote series
+keeps its existing counter. Run once after updating models:
+
+PowerShell:
+  .\venv\Scripts\Activate.ps1
+  python migrate_add_branches.py
+
+This is non-destructive: it only adds missing tables/columns and fills rows where they are NULL.
+"""
+import sqlite3
+import os
+
+from migrate_add_quotation_item_columns import column_exists
+
+
+def migrate(db_path, default_branch):
+    if not os.path.exists(db_path):
+        print(f"Database file not found: {db_path}")
+        return
+
+    conn = sqlite3.connect(db_path)
+    cur = conn.cursor()
+    try:
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS branches (
+                id INTEGER NOT NULL PRIMARY KEY,
+                code VARCHAR(20) NOT NULL UNIQUE,
+                name VARCHAR(100) NOT NULL,
+                quote_format VARCHAR(100),
+                pad_width INTEGER
+            )
+        """)
+        cur.execute("INSERT OR IGNORE INTO branches (code, name) VALUES (?, 'Head Office')", (default_branch,))
+
+        for table in ('users', 'quotations'):
+            if not column_exists(cur, table, 'branch_code'):
+                print(f'Adding column branch_code to {table}')
+                cur.execute(f"ALTER TABLE {table} ADD COLUMN branch_code VARCHAR(20)")
+            else:
+                print(f'Column branch_code already exists in {table}')
+            cur.execute(f"UPDATE {table} SET branch_code = ? WHERE branch_code IS NULL", (default_branch,))
+            print(f'Assigned {cur.rowcount} {table} row(s) to branch {default_branch}.')
+
+        conn.commit()
+        print('Migration complete.')
+    except Exception as e:
+        print('Migration failed:', e)
+        conn.rollback()
+    finally:
+        conn.close()
+
+
+if __name__ == '__main__':
+    # prefer Config.DATABASE if available
+    db = os.path.join(os.path.dirname(__file__), 'quotation.db')
+    default_branch = 'TEST'
+    try:
+        from config import Config as Cfg
+        db = Cfg.DATABASE
+        default_branch = Cfg.DEFAULT_BRANCH
+    except Exception:
+        pass
+
+    migrate(db, default_branch)
@@ -0,0 +1,46 @@
+"""
+Migration script to index `quotation_items.quotation_id`, which the detail
+route, the item count check and the streamed detail response look up by.
+Run once after updating models:
+
+PowerShell:
+  .\venv\Scripts\Activate.ps1
+  python migrate_add_quotation_item_index.py
+
+This is non-destructive and only creates the index if it is missing.
+"""
+import sqlite3
+import os
+
+
+def migrate(db_path):
+    if not os.path.exists(db_path):
+        print(f"Database file not found: {db_path}")
+        return
+
+    conn = sqlite3.connect(db_path)
+    cur = conn.cursor()
+    try:
+        cur.execute(
+            "CREATE INDEX IF NOT EXISTS ix_quotation_items_quotation_id ON quotation_items (quotation_id)"
+        )
+        conn.commit()
+        print('Index ix_quotation_items_quotation_id is present.')
+        print('Migration complete.')
+    except Exception as e:
+        print('Migration failed:', e)
+        conn.rollback()
+    finally:
+        conn.close()
+
+
+if __name__ == '__main__':
+    # prefer Config.DATABASE if available
+    db = os.path.join(os.path.dirname(__file__), 'quotation.db')
+    try:
+        from config import Config as Cfg
+        db = Cfg.DATABASE
+    except Exception:
+        pass
+
+    migrate(db)
@@ -0,0 +1,70 @@
+"""
+Migration script to add stored `subtotal`, `discount_amount` and `vat_amount`
+columns to the `quotations` table and backfill them from existing line items.
+Run once after updating models:
+
+PowerShell:
+  .\venv\Scripts\Activate.ps1
+  python migrate_add_quotation_total_columns.py
+
+This is non-destructive: it only adds missing columns and fills rows where they are NULL.
+"""
+import sqlite3
+import os
+
+from migrate_add_quotation_item_columns import column_exists
+
+VAT_RATE = 0.13
+COLUMNS = ('subtotal', 'discount_amount', 'vat_amount')
+
+
+def migrate(db_path):
+    if not os.path.exists(db_path):
+        print(f"Database file not found: {db_path}")
+        return
+
+    conn = sqlite3.connect(db_path)
+    cur = conn.cursor()
+    try:
+        for column in COLUMNS:
+            if not column_exists(cur, 'quotations', column):
+                print(f'Adding column {column} to quotations')
+                cur.execute(f"ALTER TABLE quotations ADD COLUMN {column} FLOAT")
+            else:
+                print(f'Column {column} already exists')
+
+        # Backfill: discount first, then VAT on the discounted subtotal (as in create_quotation)
+        cur.execute("""
+            SELECT q.id, q.discount_percent, COALESCE(SUM(i.qty * i.price), 0)
+            FROM quotations q LEFT JOIN quotation_items i ON i.quotation_id = q.id
+            WHERE q.subtotal IS NULL
+            GROUP BY q.id
+        """)
+        rows = []
+        for qid, discount_percent, subtotal in cur.fetchall():
+            discount_amount = subtotal * ((discount_percent or 0.0) / 100.0)
+            vat_amount = (subtotal - discount_amount) * VAT_RATE
+            rows.append((round(subtotal, 2), round(discount_amount, 2), round(vat_amount, 2), qid))
+        cur.executemany(
+            "UPDATE quotations SET subtotal = ?, discount_amount = ?, vat_amount = ? WHERE id = ?", rows
+        )
+        conn.commit()
+        print(f'Backfilled totals for {len(rows)} quotation(s).')
+        print('Migration complete.')
+    except Exception as e:
+        print('Migration failed:', e)
+        conn.rollback()
+    finally:
+        conn.close()
+
+
+if __name__ == '__main__':
+    # prefer Config.DATABASE if available
+    db = os.path.join(os.path.dirname(__file__), 'quotation.db')
+    try:
+        from config import Config as Cfg
+        db = Cfg.DATABASE
+    except Exception:
+        pass
+
+    migrate(db)
@@ -0,0 +1,44 @@
+"""
+Migration script to index `users (role, username)`, which the paginated
+user directory filters and orders by.
+Run once after updating models:
+
+PowerShell:
+  .\venv\Scripts\Activate.ps1
+  python migrate_add_user_role_index.py
+
+This is non-destructive and only creates the index if it is missing.
+"""
+import sqlite3
+import os
+
+
+def migrate(db_path):
+    if not os.path.exists(db_path):
+        print(f"Database file not found: {db_path}")
+        return
+
+    conn = sqlite3.connect(db_path)
+    cur = conn.cursor()
+    try:
+        cur.execute("CREATE INDEX IF NOT EXISTS ix_users_role_username ON users (role, username)")
+        conn.commit()
+        print('Index ix_users_role_username is present.')
+        print('Migration complete.')
+    except Exception as e:
+        print('Migration failed:', e)
+        conn.rollback()
+    finally:
+        conn.close()
+
+
+if __name__ == '__main__':
+    # prefer Config.DATABASE if available
+    db = os.path.join(os.path.dirname(__file__), 'quotation.db')
+    try:
+        from config import Config as Cfg
+        db = Cfg.DATABASE
+    except Exception:
+        pass
+
+    migrate(db)
@@ -1,8 +1,8 @@
 """
 SQLAlchemy ORM models for the Quotation Management System.
-Define: User, Engine, Part, EnginePart, Quotation, QuotationItem, Metadata
+Define: User, Branch, Engine, Part, EnginePart, Quotation, QuotationItem, Metadata, Job, CatalogChange
 """
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Text
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Text, Index
 from sqlalchemy.ext.declarative import declarative_base
 from datetime import datetime
 
@@ -16,6 +16,22 @@ class User(Base):
     username = Column(String(50), unique=True, nullable=False)
     password_hash = Column(String(255), nullable=False)
     role = Column(String(20), nullable=False, default='staff')  # 'admin' or 'staff'
+    branch_code = Column(String(20), ForeignKey('branches.code'), nullable=True)  # NULL = Config.DEFAULT_BRANCH
+
+    __table_args__ = (
+        Index('ix_users_role_username', 'role', 'username'),  # user directory: filter by role, page by name
+    )
+
+
+class Branch(Base):
+    """Branch with its own quote number series."""
+    __tablename__ = 'branches'
+    
+    id = Column(Integer, primary_key=True)
+    code = Column(String(20), unique=True, nullable=False)  # e.g. 'KTM', used in quote numbers
+    name = Column(String(100), nullable=False)
+    quote_format = Column(String(100), nullable=True)  # e.g. 'QTN/{branch}/{year}/{seq}'; NULL = Config default
+    pad_width = Column(Integer, nullable=True)  # digits of {seq}; NULL = Config default
 
 
 class Engine(Base):
@@ -53,12 +69,17 @@ class Quotation(Base):
     
     id = Column(Integer, primary_key=True)
     quote_no = Column(String(50), unique=True, nullable=False)  # e.g., 'QTN/TEST/2025/001'
+    branch_code = Column(String(20), nullable=True)  # Branch whose series issued quote_no
     customer = Column(String(200), nullable=False)
     address = Column(Text, nullable=False)
     date = Column(DateTime, nullable=False, default=datetime.now)
     labour = Column(Float, default=0.0)
     discount_percent = Column(Float, default=0.0)
     total = Column(Float, default=0.0)  # Net total after labour & discount
+    # Computed once at creation (NULL for rows created before these columns existed)
+    subtotal = Column(Float, nullable=True)
+    discount_amount = Column(Float, nullable=True)
+    vat_amount = Column(Float, nullable=True)
     created_by = Column(String(50), nullable=False)  # Username who created it
 
 
@@ -67,7 +88,7 @@ class QuotationItem(Base):
     __tablename__ = 'quotation_items'
     
     id = Column(Integer, primary_key=True)
-    quotation_id = Column(Integer, ForeignKey('quotations.id'), nullable=False)
+    quotation_id = Column(Integer, ForeignKey('quotations.id'), nullable=False, index=True)
     part_id = Column(Integer, ForeignKey('parts.id'), nullable=True)
     qty = Column(Float, nullable=False)
     price = Column(Float, nullable=False)  # Overridden price for this quotation only
@@ -81,5 +102,46 @@ class Metadata(Base):
     __tablename__ = 'metadata'
     
     id = Column(Integer, primary_key=True)
-    key = Column(String(100), unique=True, nullable=False)  # e.g., 'last_quote_increment_2025'
+    key = Column(String(100), unique=True, nullable=False)  # e.g., 'last_quote_increment_2025', 'last_quote_increment_KTM_2025'
     value = Column(String(255), nullable=False)
+
+
+class Job(Base):
+    """Background job queue entry (see services/job_queue.py)."""
+    __tablename__ = 'jobs'
+
+    id = Column(Integer, primary_key=True)
+    kind = Column(String(100), nullable=False)  # Registered handler name, e.g. 'recompute_quotation_totals'
+    payload = Column(Text, nullable=False, default='{}')  # JSON-encoded handler arguments
+    status = Column(String(20), nullable=False, default='queued')  # 'queued', 'running', 'done' or 'failed'
+    priority = Column(Integer, nullable=False, default=0)  # Higher runs first
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False, default=3)
+    progress = Column(Float, nullable=False, default=0.0)  # Percent complete, 0-100
+    message = Column(String(255), nullable=True)  # Last progress message from the handler
+    result = Column(Text, nullable=True)  # JSON-encoded handler return value
+    error = Column(Text, nullable=True)  # Traceback of the last failed attempt
+    run_after = Column(DateTime, nullable=False, default=datetime.now)  # Retry backoff
+    locked_until = Column(DateTime, nullable=True)  # Lease held by the running worker
+    worker = Column(String(100), nullable=True)
+    created_by = Column(String(50), nullable=True)
+    created_at = Column(DateTime, nullable=False, default=datetime.now)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        Index('ix_jobs_status_priority', 'status', 'priority', 'run_after'),
+    )
+
+
+class CatalogChange(Base):
+    """Versioned log of Engine/Part/EnginePart writes (see services/catalog_sync.py)."""
+    __tablename__ = 'catalog_changes'
+    __table_args__ = {'sqlite_autoincrement': True}  # versions are never reused
+
+    id = Column(Integer, primary_key=True)  # Catalog version, increases with every change
+    entity = Column(String(20), nullable=False)  # 'engine', 'part', 'engine_part' ('catalog' for a reset)
+    entity_id = Column(Integer, nullable=False)
+    op = Column(String(10), nullable=False)  # 'insert', 'update', 'delete' or 'reset' (after a restore)
+    data = Column(Text, nullable=True)  # JSON row after the change; NULL for deletes
+    changed_at = Column(DateTime, nullable=False, default=datetime.now)
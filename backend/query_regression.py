@@ -0,0 +1,243 @@
+"""
+Query-count and query-plan regression check for every API route.
+
+Runs each blueprint route against a freshly seeded throwaway database,
+records the SQL statements it executes and the EXPLAIN QUERY PLAN of each,
+and compares them with the committed baselines in query_baselines.json.
+Fails (exit code 1) when a route runs more statements than its baseline or
+when a statement scans a table it used to reach through an index.
+
+    .\venv\Scripts\python.exe query_regression.py            # check
+    .\venv\Scripts\python.exe query_regression.py --update   # rewrite baselines
+
+Every route must have a case below; a new route without one fails the check.
+"""
+import argparse
+import json
+import os
+import re
+import sqlite3
+import sys
+import tempfile
+
+os.environ['DATABASE_PATH'] = os.path.join(tempfile.mkdtemp(prefix='qtn-queries-'), 'queries.db')
+os.environ['PROFILING_ENABLED'] = '0'
+os.environ['SINGLE_WRITER_MODE'] = '0'
+
+from sqlalchemy import event  # noqa: E402
+from config import Config  # noqa: E402
+Config.SESSION_FILE_DIR = os.path.join(os.path.dirname(Config.DATABASE), 'flask_session')
+Config.BACKUP_DIR = os.path.join(os.path.dirname(Config.DATABASE), 'backups')
+from database import engine  # noqa: E402
+from db_init import init_database  # noqa: E402
+from models import Engine, Part, EnginePart  # noqa: E402
+from app import app  # noqa: E402
+from services.detail_cache import detail_cache  # noqa: E402
+
+BASELINE_FILE = os.path.join(os.path.dirname(__file__), 'query_baselines.json')
+
+# (name, role, method, path, json body, expected status). Cases run in order
+# against the same database, so later cases may rely on earlier writes.
+CASES = [
+    ('health', None, 'GET', '/api/health', None, 200),
+    ('auth.login', None, 'POST', '/api/auth/login', {'username': 'staff1', 'password': 'staff123'}, 200),
+    ('auth.me', 'staff', 'GET', '/api/auth/me', None, 200),
+    ('auth.logout', None, 'POST', '/api/auth/logout', None, 200),
+    ('auth.list_users', 'admin', 'GET', '/api/auth/users', None, 200),
+    ('auth.list_users (role page)', 'admin', 'GET', '/api/auth/users?role=staff&after=a&per_page=20', None, 200),
+    ('auth.list_users (prefix)', 'admin', 'GET', '/api/auth/users?q=staff&page=2&per_page=5', None, 200),
+    ('auth.bulk_create_users', 'admin', 'POST', '/api/auth/users/bulk',
+     {'users': [{'username': 'bulk1', 'password': 'pw-1'}, {'username': 'bulk2', 'password': 'pw-2', 'role': 'admin'},
+                {'username': 'staff1', 'password': 'pw-3'}, {'username': '', 'password': 'pw-4'}]}, 202),
+    ('admin.create_branch', 'admin', 'POST', '/api/admin/branches',
+     {'code': 'KTM', 'name': 'Kathmandu', 'quote_format': 'QTN/{branch}/{year}/{seq}', 'pad_width': 4}, 201),
+    ('admin.edit_branch', 'admin', 'PUT', '/api/admin/branches/KTM', {'name': 'Kathmandu Branch'}, 200),
+    ('admin.list_branches', 'admin', 'GET', '/api/admin/branches', None, 200),
+    ('auth.create_user', 'admin', 'POST', '/api/auth/users',
+     {'username': 'qa1', 'password': 'qa-pass', 'role': 'staff', 'branch': 'KTM'}, 201),
+    ('auth.edit_user', 'admin', 'PUT', '/api/auth/users/qa1', {'role': 'admin', 'branch': 'TEST'}, 200),
+    ('auth.edit_user (unknown branch)', 'admin', 'PUT', '/api/auth/users/staff1', {'role': 'admin', 'branch': 'NOPE'}, 400),
+    ('auth.admin_set_password', 'admin', 'POST', '/api/auth/users/qa1/set-password', {'new_password': 'qa-pass2'}, 200),
+    ('auth.delete_user', 'admin', 'DELETE', '/api/auth/users/qa1', None, 200),
+    ('quotations.get_all_categories', 'staff', 'GET', '/api/quotations/categories', None, 200),
+    ('quotations.get_models', 'staff', 'GET', '/api/quotations/models/Industrial Engine', None, 200),
+    ('quotations.get_tree', 'staff', 'GET', '/api/quotations/tree/Industrial Engine', None, 200),
+    ('quotations.get_parts', 'staff', 'GET', '/api/quotations/parts/3', None, 200),
+    ('quotations.search_parts', 'staff', 'GET', '/api/quotations/parts/search?q=Filter', None, 200),
+    ('quotations.resolve_parts', 'staff', 'POST', '/api/quotations/parts/resolve',
+     {'items': ['P001', {'part_no': 'P002', 'qty': 2}, 'SEED-0010', 'p-003', 'NOPE-1']}, 200),
+    ('quotations.get_catalog_snapshot', None, 'GET', '/api/quotations/catalog/snapshot', None, 200),
+    ('quotations.get_catalog_changes', None, 'GET', '/api/quotations/catalog/changes?since=5', None, 200),
+    ('quotations.create_quotation', 'staff', 'POST', '/api/quotations/create',
+     {'customer': 'Regression Co', 'address': 'Kathmandu', 'discount_percent': 5,
+      'items': [{'part_id': 1, 'qty': 2, 'price': 1200}, {'part_id': 2, 'qty': 1, 'price': 7500},
+                {'part_no': 'CUST-1', 'part_name': 'Custom gasket', 'qty': 1, 'price': 150}]}, 201),
+    ('quotations.create_quotation (single-writer)', 'staff', 'POST', '/api/quotations/create',
+     {'customer': 'Regression Co', 'address': 'Kathmandu', 'items': [{'part_id': 1, 'qty': 1, 'price': 1200}]}, 201),
+    ('quotations.list_quotations', 'staff', 'GET', '/api/quotations?page=1&per_page=20', None, 200),
+    ('quotations.list_quotations (admin)', 'admin', 'GET', '/api/quotations?page=1&per_page=20', None, 200),
+    ('quotations.get_quotation', 'staff', 'GET', '/api/quotations/1', None, 200),
+    ('quotations.get_quotation (cached)', 'staff', 'GET', '/api/quotations/1', None, 200),
+    ('quotations.detail_cache_stats', 'admin', 'GET', '/api/quotations/cache', None, 200),
+    ('quotations.invalidate_quotation_cache', 'admin', 'DELETE', '/api/quotations/1/cache', None, 200),
+    ('jobs.create_job', 'admin', 'POST', '/api/jobs', {'kind': 'recompute_quotation_totals'}, 202),
+    ('jobs.job_status', 'admin', 'GET', '/api/jobs/1', None, 200),
+    ('admin.profiles_index', 'admin', 'GET', '/api/admin/profiles', None, 200),
+    ('admin.get_profile_settings', 'admin', 'GET', '/api/admin/profiles/settings', None, 200),
+    ('admin.update_profile_settings', 'admin', 'PUT', '/api/admin/profiles/settings', {'sample_percent': 0}, 200),
+    ('admin.admission_metrics', 'admin', 'GET', '/api/admin/admission', None, 200),
+    ('admin.backups_index', 'admin', 'GET', '/api/admin/backups', None, 200),
+    ('admin.get_profile', 'admin', 'GET', '/api/admin/profiles/0-missing', None, 404),
+    ('admin.download_profile', 'admin', 'GET', '/api/admin/profiles/0-missing/download', None, 404),
+]
+
+# Cases run with SINGLE_WRITER_MODE on, so their write closures run on the
+# group-commit writer thread (outside the request context).
+SINGLE_WRITER_CASES = {'quotations.create_quotation (single-writer)'}
+
+CREDENTIALS = {'admin': ('admin', 'admin123'), 'staff': ('staff1', 'staff123')}
+PLANNED = ('SELECT', 'UPDATE', 'DELETE', 'WITH')
+
+
+def seed():
+    """Base sample data plus enough catalog rows for realistic plans."""
+    init_database()
+    with engine.begin() as conn:
+        conn.execute(Part.__table__.insert(), [
+            {'part_no': f'SEED-{n:04d}', 'part_name': f'Seed part {n}', 'price': 100.0 + n} for n in range(500)
+        ])
+        conn.execute(Engine.__table__.insert(), [
+            {'category': f'Seed Category {n % 5}', 'engine_name': f'Seed Engine {n}', 'parent_id': None}
+            for n in range(50)
+        ])
+        conn.execute(EnginePart.__table__.insert(), [
+            {'engine_id': 8 + n % 50, 'part_id': 4 + n} for n in range(500)
+        ])
+
+
+def normalize_sql(sql):
+    """Collapse whitespace and expanded IN lists so statements compare by shape."""
+    sql = re.sub(r'\s+', ' ', sql).strip()
+    return re.sub(r'\(\?(?:, \?)+\)', '(?, ...)', sql)
+
+
+def plan_scans(conn, sql, params):
+    """Tables the statement reads with a full SCAN (covering-index scans included)."""
+    rows = conn.execute(f'EXPLAIN QUERY PLAN {sql}', params or ()).fetchall()
+    scans = set()
+    for row in rows:
+        match = re.match(r'SCAN (\w+)', row[-1])
+        if match and match.group(1) != 'CONSTANT':
+            scans.add(match.group(1))
+    return sorted(scans)
+
+
+def capture():
+    """Run every case and return {case name: {'count': n, 'statements': [...]}}."""
+    captured = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        captured.append((statement, None if executemany else parameters))
+
+    Config.DETAIL_CACHE_EPOCH_CHECK = 0  # make the cache's epoch query deterministic
+    clients = {role: app.test_client() for role in CREDENTIALS}
+    for role, (username, password) in CREDENTIALS.items():
+        clients[role].post('/api/auth/login', json={'username': username, 'password': password})
+    clients[None] = app.test_client()
+
+    results = {}
+    plan_conn = sqlite3.connect(Config.DATABASE)
+    event.listen(engine, 'before_cursor_execute', record)
+    try:
+        for name, role, method, path, body, expected in CASES:
+            if not name.endswith('(cached)'):
+                detail_cache.clear()
+            captured.clear()
+            Config.SINGLE_WRITER_MODE = name in SINGLE_WRITER_CASES
+            try:
+                res = clients[role].open(path, method=method, json=body)
+            finally:
+                Config.SINGLE_WRITER_MODE = False
+            if res.status_code != expected:
+                raise SystemExit(f'{name}: expected HTTP {expected}, got {res.status_code}: {res.get_data(as_text=True)}')
+            statements = []
+            for sql, params in captured:
+                entry = {'sql': normalize_sql(sql)}
+                if sql.lstrip().upper().startswith(PLANNED) and params is not None:
+                    entry['scans'] = plan_scans(plan_conn, sql, params)
+                statements.append(entry)
+            results[name] = {'count': len(statements), 'statements': statements}
+    finally:
+        event.remove(engine, 'before_cursor_execute', record)
+        plan_conn.close()
+    return results
+
+
+def check_coverage():
+    """Every registered endpoint needs at least one case."""
+    adapter = app.url_map.bind('localhost')
+    covered = set()
+    for _, _, method, path, _, _ in CASES:
+        covered.add(adapter.match(path.split('?')[0], method=method)[0])
+    endpoints = {rule.endpoint for rule in app.url_map.iter_rules() if rule.endpoint != 'static'}
+    return sorted(endpoints - covered)
+
+
+def compare(baselines, results):
+    """Return a list of regression messages."""
+    problems = []
+    for name, result in results.items():
+        base = baselines.get(name)
+        if base is None:
+            problems.append(f'{name}: no baseline (run with --update)')
+            continue
+        if result['count'] > base['count']:
+            problems.append(f"{name}: {result['count']} SQL statements, baseline {base['count']}")
+        base_scans = {}
+        for stmt in base['statements']:
+            base_scans.setdefault(stmt['sql'], set()).update(stmt.get('scans', []))
+        for stmt in result['statements']:
+            new_scans = set(stmt.get('scans', [])) - base_scans.get(stmt['sql'], set())
+            if new_scans:
+                problems.append(f"{name}: full SCAN of {', '.join(sorted(new_scans))} in: {stmt['sql'][:160]}")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Check per-route SQL counts and query plans.')
+    parser.add_argument('--update', action='store_true', help='rewrite query_baselines.json')
+    args = parser.parse_args()
+
+    missing = check_coverage()
+    if missing:
+        print('✗ Routes without a query regression case: ' + ', '.join(missing))
+        return 1
+
+    seed()
+    results = capture()
+
+    if args.update:
+        with open(BASELINE_FILE, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+            f.write('\n')
+        print(f'✓ Wrote baselines for {len(results)} route cases to {os.path.basename(BASELINE_FILE)}')
+        return 0
+
+    with open(BASELINE_FILE, encoding='utf-8') as f:
+        baselines = json.load(f)
+    problems = compare(baselines, results)
+    for name, result in results.items():
+        base = baselines.get(name, {}).get('count')
+        if base is not None and result['count'] < base:
+            print(f"  note: {name} now runs {result['count']} statements (baseline {base}); consider --update")
+    if problems:
+        print('✗ Query regressions:')
+        for problem in problems:
+            print('  - ' + problem)
+        return 1
+    print(f'✓ {len(results)} route cases match their query baselines')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
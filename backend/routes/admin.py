@@ -0,0 +1,153 @@
+"""
+Admin routes: operational tooling.
+Endpoints:
+  GET    /api/admin/profiles              - Index of stored request profiles
+  GET    /api/admin/profiles/<id>         - Profile report (SQL statements + call stats)
+  GET    /api/admin/profiles/<id>/download - Raw pstats dump
+  GET    /api/admin/profiles/settings     - Current sampling percentage (and whether profiling is enabled)
+  PUT    /api/admin/profiles/settings     - Set sampling percentage. Body: {sample_percent}
+  GET    /api/admin/admission             - Per-route-class queue depths and rejections
+  GET    /api/admin/branches              - Branches with their quote format and current counter
+  POST   /api/admin/branches              - Add a branch. Body: {code, name, quote_format?, pad_width?}
+  PUT    /api/admin/branches/<code>       - Edit name, quote_format or pad_width (null resets to default)
+  GET    /api/admin/backups               - Stored database backups, newest first
+Start a backup with POST /api/jobs {"kind": "backup_database"}.
+Send `X-Profile: 1` on any request as an admin to profile just that request
+(requires PROFILING_ENABLED=1).
+"""
+import json
+import re
+from flask import Blueprint, request, jsonify, send_file, current_app
+from database import get_db_session
+from models import Branch
+from routes.auth import require_admin
+from services.write_queue import run_write
+from services.quote_service import branch_summaries, validate_quote_format
+from services.profiler import list_reports, report_path, get_sample_percent, set_sample_percent
+from services.admission import admission_stats
+from services.backup import list_backups
+
+admin_bp = Blueprint('admin', __name__, url_prefix='/api/admin')
+
+
+@admin_bp.before_request
+def admin_only():
+    if not require_admin():
+        return jsonify({'error': 'forbidden'}), 403
+
+
+@admin_bp.route('/profiles', methods=['GET'])
+def profiles_index():
+    return jsonify({'profiles': list_reports(), 'sample_percent': get_sample_percent()}), 200
+
+
+@admin_bp.route('/profiles/settings', methods=['GET'])
+def get_profile_settings():
+    return jsonify({'enabled': bool(current_app.config.get('PROFILING_ENABLED')),
+                    'sample_percent': get_sample_percent()}), 200
+
+
+@admin_bp.route('/profiles/settings', methods=['PUT'])
+def update_profile_settings():
+    data = request.json or {}
+    try:
+        set_sample_percent(data.get('sample_percent', 0))
+    except (TypeError, ValueError):
+        return jsonify({'error': 'sample_percent must be a number between 0 and 100'}), 400
+    return jsonify({'enabled': bool(current_app.config.get('PROFILING_ENABLED')),
+                    'sample_percent': get_sample_percent()}), 200
+
+
+@admin_bp.route('/profiles/<report_id>', methods=['GET'])
+def get_profile(report_id):
+    path = report_path(report_id, '.json')
+    if not path:
+        return jsonify({'error': 'profile not found'}), 404
+    with open(path, encoding='utf-8') as f:
+        return jsonify(json.load(f)), 200
+
+
+@admin_bp.route('/profiles/<report_id>/download', methods=['GET'])
+def download_profile(report_id):
+    path = report_path(report_id, '.prof')
+    if not path:
+        return jsonify({'error': 'profile not found'}), 404
+    return send_file(path, mimetype='application/octet-stream', as_attachment=True,
+                     download_name=f'{report_id}.prof')
+
+
+@admin_bp.route('/admission', methods=['GET'])
+def admission_metrics():
+    return jsonify({'route_classes': admission_stats()}), 200
+
+
+@admin_bp.route('/backups', methods=['GET'])
+def backups_index():
+    return jsonify({'backups': list_backups()}), 200
+
+
+BRANCH_CODE_RE = re.compile(r'^[A-Z0-9]{1,20}$')
+
+
+@admin_bp.route('/branches', methods=['GET'])
+def list_branches():
+    db = get_db_session()
+    try:
+        return jsonify({'branches': branch_summaries(db)}), 200
+    finally:
+        db.close()
+
+
+@admin_bp.route('/branches', methods=['POST'])
+def create_branch():
+    data = request.json or {}
+    code = (data.get('code') or '').strip().upper()
+    name = (data.get('name') or '').strip()
+    quote_format = data.get('quote_format') or None
+    pad_width = data.get('pad_width')
+    if not BRANCH_CODE_RE.match(code) or not name:
+        return jsonify({'error': 'code (1-20 letters/digits) and name required'}), 400
+    error = validate_quote_format(quote_format, pad_width)
+    if error:
+        return jsonify({'error': error}), 400
+
+    def write(db):
+        if db.query(Branch.id).filter_by(code=code).first():
+            return {'error': 'branch already exists'}, 400
+        db.add(Branch(code=code, name=name, quote_format=quote_format, pad_width=pad_width))
+        db.flush()
+        return {'message': 'branch created', 'code': code}, 201
+
+    try:
+        body, status = run_write(write)
+        return jsonify(body), status
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@admin_bp.route('/branches/<code>', methods=['PUT'])
+def edit_branch(code):
+    data = request.json or {}
+    error = validate_quote_format(data.get('quote_format') or None, data.get('pad_width'))
+    if error:
+        return jsonify({'error': error}), 400
+
+    def write(db):
+        branch = db.query(Branch).filter_by(code=code).first()
+        if not branch:
+            return {'error': 'branch not found'}, 404
+        if data.get('name'):
+            branch.name = data['name']
+        # The series keeps counting; only how numbers render changes
+        if 'quote_format' in data:
+            branch.quote_format = data['quote_format'] or None
+        if 'pad_width' in data:
+            branch.pad_width = data['pad_width']
+        db.flush()
+        return {'message': 'branch updated', 'code': code}, 200
+
+    try:
+        body, status = run_write(write)
+        return jsonify(body), status
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
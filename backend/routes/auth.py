@@ -1,8 +1,12 @@
 from flask import Blueprint, request, session, jsonify
 from werkzeug.security import check_password_hash
 from database import get_db_session
-from models import User
+from config import Config
+from models import User, Branch
 from werkzeug.security import generate_password_hash
+from services.write_queue import run_write
+from services.job_queue import enqueue
+import services.job_handlers  # noqa: F401  (registers handlers)
 
 def require_login_username():
     username = session.get('username')
@@ -13,6 +17,14 @@ def require_admin():
         return True
     return False
 
+def branch_exists(db, code):
+    # The default branch is valid even before a Branch row exists for it
+    return code == Config.DEFAULT_BRANCH or db.query(Branch.id).filter_by(code=code).first() is not None
+
+def user_branch(db, username):
+    # Read from the user row, not the login session: an admin may move a logged-in user
+    return db.query(User.branch_code).filter_by(username=username).scalar() or Config.DEFAULT_BRANCH
+
 auth_bp = Blueprint('auth', __name__, url_prefix='/api/auth')
 
 
@@ -40,7 +52,8 @@ def login():
     session['username'] = user.username
     session['role'] = user.role
 
-    return jsonify({'message': 'login successful', 'username': user.username, 'role': user.role}), 200
+    return jsonify({'message': 'login successful', 'username': user.username, 'role': user.role,
+                    'branch': user.branch_code or Config.DEFAULT_BRANCH}), 200
 
 
 @auth_bp.route('/logout', methods=['POST'])
@@ -55,19 +68,65 @@ def me():
     role = session.get('role')
     if not username:
         return jsonify({'user': None}), 200
-    return jsonify({'user': {'username': username, 'role': role}}), 200
+    db = get_db_session()
+    try:
+        branch = user_branch(db, username)
+    finally:
+        db.close()
+    return jsonify({'user': {'username': username, 'role': role, 'branch': branch}}), 200
 
 
 @auth_bp.route('/users', methods=['GET'])
 def list_users():
-    """Admin-only: List all users."""
+    """Admin-only: List users ordered by username, one page at a time.
+    Query: role, branch, q (username prefix), per_page, and either `after`
+    (the previous page's `next_after`) or `page`.
+    """
     if not require_admin():
         return jsonify({'error': 'forbidden'}), 403
+    try:
+        page = max(1, int(request.args.get('page', 1)))
+        per_page = int(request.args.get('per_page', Config.USERS_PAGE_SIZE))
+    except ValueError:
+        return jsonify({'error': 'page and per_page must be integers'}), 400
+    if per_page <= 0:
+        per_page = Config.USERS_PAGE_SIZE
+    per_page = min(per_page, Config.USERS_PAGE_MAX)
+    role = request.args.get('role')
+    branch = request.args.get('branch')
+    prefix = request.args.get('q')
+    after = request.args.get('after')
+
     db = get_db_session()
     try:
-        users = db.query(User).all()
-        result = [{'username': u.username, 'role': u.role} for u in users]
-        return jsonify({'users': result}), 200
+        query = db.query(User.username, User.role, User.branch_code)
+        if role:
+            query = query.filter(User.role == role)  # ix_users_role_username
+        if branch:
+            if branch == Config.DEFAULT_BRANCH:
+                query = query.filter((User.branch_code == branch) | (User.branch_code.is_(None)))
+            else:
+                query = query.filter(User.branch_code == branch)
+        if prefix:
+            # Range instead of LIKE so the username index is used
+            query = query.filter(User.username >= prefix, User.username < prefix + '\U0010ffff')
+        total = query.count()
+        if after is not None:
+            query = query.filter(User.username > after).order_by(User.username)
+        else:
+            query = query.order_by(User.username).offset((page - 1) * per_page)
+        rows = query.limit(per_page + 1).all()
+        more = len(rows) > per_page
+        rows = rows[:per_page]
+        result = [{'username': u.username, 'role': u.role, 'branch': u.branch_code or Config.DEFAULT_BRANCH}
+                  for u in rows]
+        return jsonify({
+            'users': result,
+            'total': total,
+            'page': page if after is None else None,
+            'per_page': per_page,
+            'next_after': rows[-1].username if more else None
+        }), 200
     finally:
         db.close()
 
@@ -75,7 +134,7 @@ def list_users():
 @auth_bp.route('/users', methods=['POST'])
 def create_user():
     """Admin-only: Create a new staff/admin user.
-    Body: {username, password, role}
+    Body: {username, password, role, branch}
     """
     if not require_admin():
         return jsonify({'error': 'forbidden'}), 403
@@ -83,47 +142,83 @@ def create_user():
     username = data.get('username')
     password = data.get('password')
     role = data.get('role', 'staff')
+    branch = data.get('branch') or Config.DEFAULT_BRANCH
     if not username or not password:
         return jsonify({'error': 'username and password required'}), 400
-    db = get_db_session()
-    try:
+    # Hash outside the write so the writer never waits on it
+    password_hash = generate_password_hash(password)
+
+    def write(db):
         if db.query(User).filter_by(username=username).first():
-            return jsonify({'error': 'username already exists'}), 400
-        user = User(username=username, password_hash=generate_password_hash(password), role=role)
-        db.add(user)
-        db.commit()
-        return jsonify({'message': 'user created', 'username': username}), 201
+            return {'error': 'username already exists'}, 400
+        if not branch_exists(db, branch):
+            return {'error': f'unknown branch: {branch}'}, 400
+        db.add(User(username=username, password_hash=password_hash, role=role, branch_code=branch))
+        db.flush()
+        return {'message': 'user created', 'username': username}, 201
+
+    try:
+        body, status = run_write(write)
+        return jsonify(body), status
     except Exception as e:
-        db.rollback()
         return jsonify({'error': str(e)}), 500
-    finally:
-        db.close()
+
+
+@auth_bp.route('/users/bulk', methods=['POST'])
+def bulk_create_users():
+    """Admin-only: Create many users at once, as a background job.
+    Body: {users: [{username, password, role, branch}, ...]}
+    Returns 202 with the job id; the job result lists each row's outcome plus timings.
+    """
+    if not require_admin():
+        return jsonify({'error': 'forbidden'}), 403
+    data = request.json or {}
+    rows = data.get('users')
+    if not isinstance(rows, list) or not rows:
+        return jsonify({'error': 'users must be a non-empty list'}), 400
+    if len(rows) > Config.USER_IMPORT_MAX_ROWS:
+        return jsonify({'error': f'at most {Config.USER_IMPORT_MAX_ROWS} users per import'}), 400
+    try:
+        # Hashing thousands of initial passwords takes minutes: run it in a worker
+        job_id = enqueue('import_users', payload={'users': rows}, max_attempts=1,
+                         created_by=session.get('username'))
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+    return jsonify({'id': job_id, 'status': 'queued', 'rows': len(rows), 'status_url': f'/api/jobs/{job_id}'}), 202
 
 
 @auth_bp.route('/users/<username>', methods=['PUT'])
 def edit_user(username):
-    """Admin-only: Edit user's role or password. Body may include `role` and/or `password`."""
+    """Admin-only: Edit user's role, branch or password. Body may include `role`, `branch` and/or `password`."""
     if not require_admin():
         return jsonify({'error': 'forbidden'}), 403
     data = request.json or {}
     role = data.get('role')
+    branch = data.get('branch')
     password = data.get('password')
-    db = get_db_session()
-    try:
+    password_hash = generate_password_hash(password) if password else None
+
+    def write(db):
         user = db.query(User).filter_by(username=username).first()
         if not user:
-            return jsonify({'error': 'user not found'}), 404
+            return {'error': 'user not found'}, 404
+        # Validate before changing anything: an error result still commits
+        if branch and not branch_exists(db, branch):
+            return {'error': f'unknown branch: {branch}'}, 400
         if role:
             user.role = role
-        if password:
-            user.password_hash = generate_password_hash(password)
-        db.commit()
-        return jsonify({'message': 'user updated', 'username': username}), 200
+        if branch:
+            user.branch_code = branch
+        if password_hash:
+            user.password_hash = password_hash
+        db.flush()
+        return {'message': 'user updated', 'username': username}, 200
+
+    try:
+        body, status = run_write(write)
+        return jsonify(body), status
     except Exception as e:
-        db.rollback()
         return jsonify({'error': str(e)}), 500
-    finally:
-        db.close()
 
 
 @auth_bp.route('/users/<username>', methods=['DELETE'])
@@ -131,19 +226,20 @@ def delete_user(username):
     """Admin-only: Delete a user."""
     if not require_admin():
         return jsonify({'error': 'forbidden'}), 403
-    db = get_db_session()
-    try:
+
+    def write(db):
         user = db.query(User).filter_by(username=username).first()
         if not user:
-            return jsonify({'error': 'user not found'}), 404
+            return {'error': 'user not found'}, 404
         db.delete(user)
-        db.commit()
-        return jsonify({'message': 'user deleted'}), 200
+        db.flush()
+        return {'message': 'user deleted'}, 200
+
+    try:
+        body, status = run_write(write)
+        return jsonify(body), status
     except Exception as e:
-        db.rollback()
         return jsonify({'error': str(e)}), 500
-    finally:
-        db.close()
 
 
 @auth_bp.route('/users/<username>/set-password', methods=['POST'])
@@ -157,16 +253,18 @@ def admin_set_password(username):
     new = data.get('new_password')
     if not new:
         return jsonify({'error': 'new_password required'}), 400
-    db = get_db_session()
-    try:
+    password_hash = generate_password_hash(new)
+
+    def write(db):
         user = db.query(User).filter_by(username=username).first()
         if not user:
-            return jsonify({'error': 'user not found'}), 404
-        user.password_hash = generate_password_hash(new)
-        db.commit()
-        return jsonify({'message': 'password set'}), 200
+            return {'error': 'user not found'}, 404
+        user.password_hash = password_hash
+        db.flush()
+        return {'message': 'password set'}, 200
+
+    try:
+        body, status = run_write(write)
+        return jsonify(body), status
     except Exception as e:
-        db.rollback()
         return jsonify({'error': str(e)}), 500
-    finally:
-        db.close()
@@ -0,0 +1,48 @@
+"""
+Background job routes.
+Endpoints:
+  POST   /api/jobs           - Admin-only: enqueue a job, returns immediately
+  GET    /api/jobs/<id>      - Poll job status, progress and result
+"""
+from flask import Blueprint, request, session, jsonify
+from routes.auth import require_admin
+from services.job_queue import enqueue, get_job, JOB_HANDLERS
+import services.job_handlers  # noqa: F401  (registers handlers)
+
+jobs_bp = Blueprint('jobs', __name__, url_prefix='/api/jobs')
+
+
+@jobs_bp.route('', methods=['POST'])
+def create_job():
+    """Admin-only: enqueue a background job.
+    Body: {kind, payload, priority, max_attempts}
+    """
+    if not require_admin():
+        return jsonify({'error': 'forbidden'}), 403
+    data = request.json or {}
+    kind = data.get('kind')
+    if kind not in JOB_HANDLERS:
+        return jsonify({'error': 'unknown job kind', 'kinds': sorted(JOB_HANDLERS)}), 400
+    try:
+        job_id = enqueue(
+            kind,
+            payload=data.get('payload') or {},
+            priority=int(data.get('priority', 0)),
+            max_attempts=int(data.get('max_attempts', 3)),
+            created_by=session.get('username')
+        )
+    except (TypeError, ValueError) as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify({'id': job_id, 'status': 'queued', 'status_url': f'/api/jobs/{job_id}'}), 202
+
+
+@jobs_bp.route('/<int:job_id>', methods=['GET'])
+def job_status(job_id):
+    """Get job status. Admins see every job; other users only their own."""
+    username = session.get('username')
+    if not username:
+        return jsonify({'error': 'unauthorized'}), 401
+    job = get_job(job_id)
+    if not job or (not require_admin() and job['created_by'] != username):
+        return jsonify({'error': 'job not found'}), 404
+    return jsonify(job), 200
@@ -4,16 +4,30 @@ Endpoints:
   POST   /api/quotations/create     - Create new quotation header
   GET    /api/quotations            - List all quotations
   GET    /api/quotations/<id>       - Get quotation detail
+  DELETE /api/quotations/<id>/cache - Admin-only: invalidate cached detail
+  GET    /api/quotations/cache      - Admin-only: detail cache metrics
   GET    /api/quotations/categories - Get all categories
   GET    /api/quotations/models/<category> - Get models for category
   GET    /api/quotations/parts/<engine_id> - Get parts for engine
+  POST   /api/quotations/parts/resolve - Resolve a pasted list of part numbers
+  GET    /api/quotations/catalog/snapshot - Full catalog with its version
+  GET    /api/quotations/catalog/changes?since=<version> - Catalog changes since a version
 """
-from flask import Blueprint, request, session, jsonify
+from flask import Blueprint, request, session, jsonify, current_app
 from datetime import datetime
 from database import get_db_session
-from models import Quotation, QuotationItem, User, Part
+from models import Quotation, User, Part
+from routes.auth import require_admin, user_branch
+from services.write_queue import run_write
+from services.detail_cache import detail_cache, invalidate_quotation
+from services.parts_service import parse_bom_entries, resolve_part_numbers
+from services.catalog_sync import catalog_snapshot, catalog_changes_since
 from services.quote_service import (
-    generate_quote_number,
+    normalize_quotation_items,
+    create_quotation_record,
+    count_quotation_items,
+    build_quotation_detail,
+    iter_quotation_detail_json,
     get_categories,
     get_models_by_category,
     build_engine_tree_for_category,
@@ -91,6 +105,38 @@ def search_parts():
         db.close()
 
 
+@quotations_bp.route('/catalog/snapshot', methods=['GET'])
+def get_catalog_snapshot():
+    """Full engine/part/engine-part catalog as compact row arrays, with its version.
+    Clients bootstrap from this and then poll /catalog/changes?since=<version>.
+    """
+    db = get_db_session()
+    try:
+        return jsonify(catalog_snapshot(db)), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+    finally:
+        db.close()
+
+
+@quotations_bp.route('/catalog/changes', methods=['GET'])
+def get_catalog_changes():
+    """Catalog inserts/updates/deletes after version `since` (paged by `limit`)."""
+    try:
+        since = int(request.args.get('since', 0))
+        limit = int(request.args.get('limit', current_app.config['CATALOG_CHANGES_PAGE_SIZE']))
+    except ValueError:
+        return jsonify({'error': 'since and limit must be integers'}), 400
+    limit = max(1, min(limit, current_app.config['CATALOG_CHANGES_PAGE_SIZE']))
+    db = get_db_session()
+    try:
+        return jsonify(catalog_changes_since(db, since, limit)), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+    finally:
+        db.close()
+
+
 # ========== PROTECTED ENDPOINTS (require session) ==========
 
 def require_login():
@@ -100,6 +146,38 @@ def require_login():
     return session.get('username')
 
 
+@quotations_bp.route('/parts/resolve', methods=['POST'])
+def resolve_parts():
+    """Resolve a pasted bill of materials in one pass.
+    Body JSON:
+    {
+      "items": [{"part_no": "P001", "qty": 2}, "P002", ...]
+    }
+    Returns matched parts (with summed qty) and misses with near-match suggestions.
+    """
+    if not require_login():
+        return jsonify({'error': 'unauthorized'}), 401
+    data = request.json or {}
+    entries = data.get('items') or []
+    if not isinstance(entries, list):
+        return jsonify({'error': 'items must be a list'}), 400
+    if len(entries) > current_app.config['PARTS_RESOLVE_MAX_ITEMS']:
+        return jsonify({'error': f"at most {current_app.config['PARTS_RESOLVE_MAX_ITEMS']} items per request"}), 400
+    try:
+        wanted = parse_bom_entries(entries)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    db = get_db_session()
+    try:
+        result = resolve_part_numbers(db, wanted)
+        result['requested'] = len(wanted)
+        return jsonify(result), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+    finally:
+        db.close()
+
+
 @quotations_bp.route('/create', methods=['POST'])
 def create_quotation():
     """
@@ -138,75 +216,25 @@ def create_quotation():
     
     if not customer or not address:
         return jsonify({'error': 'customer and address required'}), 400
+    if isinstance(items, list) and len(items) > current_app.config['QUOTATION_MAX_ITEMS']:
+        return jsonify({'error': f"at most {current_app.config['QUOTATION_MAX_ITEMS']} items per quotation"}), 400
     # Validate items: qty >= 1 and price >= 0
-    for it in items:
-        try:
-            q = float(it.get('qty', 0))
-            p = float(it.get('price', 0))
-        except Exception:
-            return jsonify({'error': 'invalid item qty/price'}), 400
-        if q < 1 or p < 0:
-            return jsonify({'error': 'item qty must be >=1 and price >=0'}), 400
+    try:
+        lines, subtotal = normalize_quotation_items(items)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     
-    db = get_db_session()
     try:
-        # Generate quote number
-        quote_no = generate_quote_number()
-        
-        # Calculate totals: apply discount first, then VAT(13%) on discounted subtotal
-        subtotal = sum(float(item.get('qty', 0)) * float(item.get('price', 0)) for item in items)
-        discount_amount = subtotal * (discount_percent / 100.0)
-        discounted_subtotal = subtotal - discount_amount
-        vat_amount = discounted_subtotal * 0.13
-        total = discounted_subtotal + vat_amount
-        
-        # Create quotation
-        quotation = Quotation(
-            quote_no=quote_no,
-            customer=customer,
-            address=address,
-            date=quote_date or datetime.now(),
-            labour=labour,
-            discount_percent=discount_percent,
-            total=round(total, 2),
-            created_by=username
-        )
-        db.add(quotation)
-        db.flush()  # Get quotation ID
-        
-        # Add line items (support ad-hoc custom parts with part_no/part_name)
-        for item in items:
-            pid = item.get('part_id')
-            # Normalize None/empty
-            if pid in (None, '', 0):
-                pid = None
-            line = QuotationItem(
-                quotation_id=quotation.id,
-                part_id=pid,
-                qty=float(item.get('qty', 0)),
-                price=float(item.get('price', 0)),
-                part_no=item.get('part_no'),
-                part_name=item.get('part_name')
-            )
-            db.add(line)
-        
-        db.commit()
-        
-        return jsonify({
-            'message': 'quotation created',
-            'quote_no': quote_no,
-            'id': quotation.id,
-            'total': quotation.total,
-            'subtotal': round(subtotal, 2),
-            'vat': round(vat_amount, 2),
-            'discount_amount': round(discount_amount, 2)
-        }), 201
-        
+        result = run_write(lambda db: create_quotation_record(
+            db, username, customer, address, lines, subtotal, discount_percent,
+            quote_date=quote_date, labour=labour, branch_code=user_branch(db, username)
+        ))
+        return jsonify(result), 201
+    except ValueError as e:
+        # Unknown part_id
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
-        db.rollback()
         return jsonify({'error': str(e)}), 500
-    finally:
-        db.close()
 
 
 @quotations_bp.route('', methods=['GET'])
@@ -256,61 +284,44 @@ def list_quotations():
 
 @quotations_bp.route('/<int:qid>', methods=['GET'])
 def get_quotation(qid):
-    """Get quotation detail with all line items."""
+    """Get quotation detail with all line items (served from the detail cache when possible)."""
     username = require_login()
     if not username:
         return jsonify({'error': 'unauthorized'}), 401
     
-    db = get_db_session()
-    try:
-        quotation = db.query(Quotation).filter_by(id=qid).first()
-        if not quotation:
+    body = detail_cache.get(qid)
+    if body is None:
+        db = get_db_session()
+        try:
+            token = detail_cache.fill_token(db)
+            if count_quotation_items(db, qid) > current_app.config['QUOTATION_STREAM_THRESHOLD']:
+                # Very large quotation: stream items instead of building (and caching) it in memory
+                chunks = iter_quotation_detail_json(qid, current_app.json.dumps)
+                return current_app.response_class(chunks, status=200, mimetype='application/json')
+            result = build_quotation_detail(db, qid)
+        except Exception as e:
+            return jsonify({'error': str(e)}), 500
+        finally:
+            db.close()
+        if result is None:
             return jsonify({'error': 'quotation not found'}), 404
-        
-        items = db.query(QuotationItem).filter_by(quotation_id=qid).all()
-        
-        result = {
-            'id': quotation.id,
-            'quote_no': quotation.quote_no,
-            'customer': quotation.customer,
-            'address': quotation.address,
-            'date': quotation.date.strftime('%Y-%m-%d'),
-            # Labour is internal; still stored but not shown in UI by default
-            'labour': round(quotation.labour, 2),
-            'discount_percent': quotation.discount_percent,
-            'total': round(quotation.total, 2),
-            'created_by': quotation.created_by,
-            'items': [
-                {
-                    'part_id': i.part_id,
-                    'part_no': i.part_no,
-                    'part_name': i.part_name,
-                    'qty': i.qty,
-                    'price': round(i.price, 2)
-                }
-                for i in items
-            ]
-        }
-        # Enrich items: if part_name missing but part_id present, fetch from parts table
-        for idx, it in enumerate(result['items']):
-            if (not it.get('part_name')) and it.get('part_id'):
-                try:
-                    p = db.query(Part).filter_by(id=it.get('part_id')).first()
-                    if p:
-                        it['part_name'] = p.part_name
-                        it['part_no'] = p.part_no
-                except Exception:
-                    pass
-        # compute subtotal/discount/vat for the quotation detail response
-        subtotal = sum((it.get('qty') or 0) * (it.get('price') or 0) for it in result['items'])
-        discount_amount = subtotal * (quotation.discount_percent / 100.0)
-        discounted_subtotal = subtotal - discount_amount
-        vat_amount = discounted_subtotal * 0.13
-        result['subtotal'] = round(subtotal, 2)
-        result['discount_amount'] = round(discount_amount, 2)
-        result['vat'] = round(vat_amount, 2)
-        return jsonify(result), 200
-    except Exception as e:
-        return jsonify({'error': str(e)}), 500
-    finally:
-        db.close()
+        body = current_app.json.dumps(result).encode('utf-8')
+        detail_cache.put(qid, body, token)
+    return current_app.response_class(body, status=200, mimetype='application/json')
+
+
+@quotations_bp.route('/cache', methods=['GET'])
+def detail_cache_stats():
+    """Admin-only: hit-rate and size metrics of the quotation detail cache."""
+    if not require_admin():
+        return jsonify({'error': 'forbidden'}), 403
+    return jsonify(detail_cache.stats()), 200
+
+
+@quotations_bp.route('/<int:qid>/cache', methods=['DELETE'])
+def invalidate_quotation_cache(qid):
+    """Admin-only: drop a quotation's cached detail after a correction."""
+    if not require_admin():
+        return jsonify({'error': 'forbidden'}), 403
+    invalidate_quotation(qid)
+    return jsonify({'message': 'cache invalidated', 'id': qid}), 200
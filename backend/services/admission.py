@@ -0,0 +1,142 @@
+"""
+Admission control: per-route-class concurrency limits with bounded queues.
+
+Each request is mapped to a route class by its endpoint. A class admits up
+to `concurrency` requests at once; further requests wait in a queue of at
+most `queue` entries for up to `timeout` seconds. When the queue is full or
+the wait times out the request fails fast with 503 and Retry-After, so a
+burst of slow writes cannot starve cheap reads of worker threads.
+
+Waiting requests still hold a server thread. The limits only protect other
+classes if every admitted or queued request fits in the server's thread
+pool (SERVER_THREADS): init_admission warns when the sum of concurrency +
+queue over all classes does not.
+
+Endpoints with no class (health, /auth/me, /auth/logout, and the
+/admin/admission metrics, which must answer during saturation) are never
+gated.
+"""
+import logging
+import threading
+from flask import g, request, jsonify
+from config import Config
+
+ROUTE_CLASSES = {
+    'auth': ('auth.login',),
+    'catalog_read': (
+        'quotations.get_all_categories', 'quotations.get_models', 'quotations.get_tree',
+        'quotations.get_parts', 'quotations.search_parts', 'quotations.resolve_parts',
+        'quotations.get_catalog_changes', 'quotations.list_quotations', 'quotations.get_quotation',
+        'jobs.job_status',
+    ),
+    'quotation_write': ('quotations.create_quotation',),
+    'admin': (
+        'auth.list_users', 'auth.create_user', 'auth.bulk_create_users', 'auth.edit_user', 'auth.delete_user',
+        'auth.admin_set_password', 'quotations.detail_cache_stats', 'quotations.invalidate_quotation_cache',
+        'jobs.create_job',
+    ),
+    'export': ('quotations.get_catalog_snapshot',),
+}
+_CLASS_BY_ENDPOINT = {ep: name for name, endpoints in ROUTE_CLASSES.items() for ep in endpoints}
+UNGATED = ('admin.admission_metrics',)
+
+
+def route_class(endpoint):
+    """Route class of an endpoint; every other /api/admin route is 'admin'."""
+    if endpoint in UNGATED:
+        return None
+    if endpoint and endpoint.startswith('admin.'):
+        return 'admin'
+    return _CLASS_BY_ENDPOINT.get(endpoint)
+
+
+class RouteClassGate:
+    """Concurrency limit plus bounded wait queue for one route class."""
+
+    def __init__(self, name, concurrency, queue, timeout):
+        self.name = name
+        self.concurrency = concurrency
+        self.queue = queue
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(concurrency)
+        self._lock = threading.Lock()
+        self._active = 0
+        self._waiting = 0
+        self._counters = {'admitted': 0, 'rejected_queue_full': 0, 'rejected_timeout': 0, 'max_waiting': 0}
+
+    def acquire(self):
+        """Take a slot, waiting in the queue if needed. Returns False on rejection."""
+        with self._lock:
+            if self._slots.acquire(blocking=False):
+                self._active += 1
+                self._counters['admitted'] += 1
+                return True
+            if self._waiting >= self.queue:
+                self._counters['rejected_queue_full'] += 1
+                return False
+            self._waiting += 1
+            self._counters['max_waiting'] = max(self._counters['max_waiting'], self._waiting)
+        admitted = self._slots.acquire(timeout=self.timeout)
+        with self._lock:
+            self._waiting -= 1
+            if admitted:
+                self._active += 1
+                self._counters['admitted'] += 1
+            else:
+                self._counters['rejected_timeout'] += 1
+        return admitted
+
+    def release(self):
+        with self._lock:
+            self._active -= 1
+        self._slots.release()
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._counters)
+            stats.update(active=self._active, waiting=self._waiting, concurrency=self.concurrency,
+                         queue=self.queue, timeout=self.timeout)
+        stats['rejected'] = stats['rejected_queue_full'] + stats['rejected_timeout']
+        return stats
+
+
+gates = {}
+
+
+def _admit():
+    name = route_class(request.endpoint)
+    gate = gates.get(name)
+    if gate is None:
+        return None
+    if not gate.acquire():
+        response = jsonify({'error': 'server busy, retry later', 'route_class': name})
+        response.status_code = 503
+        response.headers['Retry-After'] = str(Config.ADMISSION_RETRY_AFTER)
+        return response
+    g.admission_gate = gate
+    return None
+
+
+def _release(exc):
+    gate = g.pop('admission_gate', None)
+    if gate is not None:
+        gate.release()
+
+
+def init_admission(app):
+    """Create the gates from ADMISSION_LIMITS and register the hooks."""
+    if not app.config.get('ADMISSION_CONTROL_ENABLED'):
+        return
+    for name, limits in app.config['ADMISSION_LIMITS'].items():
+        gates[name] = RouteClassGate(name, limits['concurrency'], limits['queue'], limits['timeout'])
+    held = sum(gate.concurrency + gate.queue for gate in gates.values())
+    if held >= app.config['SERVER_THREADS']:
+        logging.warning('Admission limits can hold %d requests but the server has %d threads (SERVER_THREADS): '
+                        'queued requests can starve other routes', held, app.config['SERVER_THREADS'])
+    # Run before every other hook so rejected requests cost as little as possible
+    app.before_request_funcs.setdefault(None, []).insert(0, _admit)
+    app.teardown_request(_release)
+
+
+def admission_stats():
+    return {name: gate.stats() for name, gate in gates.items()}
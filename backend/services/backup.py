@@ -0,0 +1,307 @@
+"""
+Online database backups.
+
+`create_backup` copies the live database with SQLite's backup API in steps
+of BACKUP_PAGES_PER_STEP pages and sleeps BACKUP_STEP_PAUSE between steps,
+so the app keeps serving while the copy runs.
+
+In WAL mode (Config.SQLITE_JOURNAL_MODE) the copy runs inside one read
+transaction: it is a consistent snapshot, and concurrent commits neither
+wait for it nor restart it. In rollback-journal mode every commit from
+another connection restarts the copy; after BACKUP_MAX_RESTARTS restarts the
+remaining pages are copied in a single step, which blocks commits for as
+long as that copy takes.
+
+Backups are checked with PRAGMA integrity_check before they are kept,
+optionally gzipped, and pruned to the newest BACKUP_RETENTION files.
+"""
+import contextlib
+import gzip
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+from datetime import datetime
+from config import Config
+
+PREFIX = 'quotation-'
+EPOCH_KEY = 'detail_cache_epoch'  # see services/detail_cache.py
+CATALOG_RESET_OP = 'reset'  # see services/catalog_sync.py
+
+
+class BackupError(Exception):
+    pass
+
+
+class _TooManyRestarts(Exception):
+    pass
+
+
+def _backup_dir(dest_dir):
+    path = dest_dir or Config.BACKUP_DIR
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def create_backup(dest_dir=None, compress=None, pages=None, pause=None, progress=None, source=None):
+    """Back up `source` (default Config.DATABASE) and return a summary dict.
+
+    `progress(copied_pages, total_pages)` is called after every step.
+    Raises BackupError if the copy fails its integrity check.
+    """
+    dest_dir = _backup_dir(dest_dir)
+    compress = Config.BACKUP_COMPRESS if compress is None else compress
+    pages = pages or Config.BACKUP_PAGES_PER_STEP
+    pause = Config.BACKUP_STEP_PAUSE if pause is None else pause
+    source = source or Config.DATABASE
+    name = f"{PREFIX}{datetime.now().strftime('%Y%m%dT%H%M%S%f')}.db"  # sorts chronologically
+    partial = os.path.join(dest_dir, name + '.partial')
+
+    started = time.perf_counter()
+    state = {'steps': 0, 'restarts': 0, 'remaining': None, 'total': 0}
+    src = sqlite3.connect(source, timeout=30, isolation_level=None)
+    dst = sqlite3.connect(partial)
+    try:
+        journal_mode = src.execute('PRAGMA journal_mode').fetchone()[0].lower()
+        snapshot = journal_mode == 'wal'
+        if snapshot:
+            # Hold one read transaction so every step copies the same snapshot
+            src.execute('BEGIN')
+            src.execute('SELECT count(*) FROM sqlite_master').fetchone()
+
+        def on_step(status, remaining, total):
+            if state['remaining'] is not None and remaining > state['remaining']:
+                state['restarts'] += 1
+            state.update(steps=state['steps'] + 1, remaining=remaining, total=total)
+            if progress:
+                progress(total - remaining, total)
+            if not snapshot and state['restarts'] >= Config.BACKUP_MAX_RESTARTS:
+                raise _TooManyRestarts()
+            if remaining:
+                time.sleep(pause)
+
+        one_step = False
+        try:
+            src.backup(dst, pages=pages, progress=on_step)
+        except _TooManyRestarts:
+            one_step = True
+            src.backup(dst, pages=-1)
+        if snapshot:
+            src.execute('COMMIT')
+
+        # A standalone file: no -wal/-shm companions when it is opened later
+        dst.execute('PRAGMA journal_mode=DELETE')
+        page_count = dst.execute('PRAGMA page_count').fetchone()[0]
+        integrity = [row[0] for row in dst.execute('PRAGMA integrity_check').fetchall()]
+    except Exception:
+        dst.close()
+        _remove(partial)
+        raise
+    finally:
+        src.close()
+    dst.close()
+    if integrity != ['ok']:
+        _remove(partial)
+        raise BackupError('backup failed integrity check: ' + '; '.join(integrity[:5]))
+
+    final = os.path.join(dest_dir, name + ('.gz' if compress else ''))
+    if compress:
+        with open(partial, 'rb') as f_in, gzip.open(final, 'wb', compresslevel=6) as f_out:
+            shutil.copyfileobj(f_in, f_out, 1024 * 1024)
+        os.remove(partial)
+    else:
+        os.replace(partial, final)
+    prune_backups(dest_dir)
+
+    return {
+        'file': os.path.basename(final),
+        'path': final,
+        'bytes': os.path.getsize(final),
+        'pages': page_count,
+        'steps': state['steps'],
+        'restarts': state['restarts'],
+        'one_step_fallback': one_step,
+        'journal_mode': journal_mode,
+        'seconds': round(time.perf_counter() - started, 3)
+    }
+
+
+@contextlib.contextmanager
+def _plain_copy(path):
+    """Yield a path to an uncompressed copy of the backup at `path`."""
+    if not os.path.exists(path):
+        raise BackupError(f'backup not found: {path}')
+    if not path.endswith('.gz'):
+        yield path
+        return
+    tmp_dir = tempfile.mkdtemp(prefix='qtn-restore-')
+    plain = os.path.join(tmp_dir, 'backup.db')
+    try:
+        with gzip.open(path, 'rb') as f_in, open(plain, 'wb') as f_out:
+            shutil.copyfileobj(f_in, f_out, 1024 * 1024)
+        yield plain
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+def _check(plain):
+    conn = sqlite3.connect(f'file:{plain}?mode=ro', uri=True)
+    try:
+        integrity = [row[0] for row in conn.execute('PRAGMA integrity_check').fetchall()]
+        counts = {}
+        if integrity == ['ok']:
+            for table in ('users', 'quotations', 'quotation_items', 'parts'):
+                try:
+                    counts[table] = conn.execute(f'SELECT count(*) FROM {table}').fetchone()[0]
+                except sqlite3.DatabaseError:
+                    counts[table] = None
+        return integrity, counts
+    finally:
+        conn.close()
+
+
+def verify_backup(path):
+    """Integrity-check a backup file (.db or .db.gz). Returns {'ok', 'integrity', 'rows'}."""
+    try:
+        with _plain_copy(path) as plain:
+            integrity, counts = _check(plain)
+    except (OSError, EOFError, sqlite3.DatabaseError) as e:
+        return {'ok': False, 'integrity': [str(e)], 'rows': {}}
+    return {'ok': integrity == ['ok'], 'integrity': integrity[:20], 'rows': counts}
+
+
+def _read_epoch(conn):
+    try:
+        row = conn.execute('SELECT value FROM metadata WHERE key = ?', (EPOCH_KEY,)).fetchone()
+    except sqlite3.DatabaseError:
+        return 0
+    return int(row[0]) if row and row[0] else 0
+
+
+def _catalog_version(conn):
+    # AUTOINCREMENT high-water mark: covers change ids that were issued and rolled back
+    try:
+        row = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'catalog_changes'").fetchone()
+    except sqlite3.DatabaseError:
+        return 0
+    return row[0] if row else 0
+
+
+def _mark_catalog_reset(conn, live_version):
+    """Log a catalog reset above every version clients may have seen.
+
+    The restored change log ends at the backup's version, so clients that
+    synced newer changes would otherwise wait for versions that were rolled
+    back and then apply later changes on top of a catalog that no longer
+    exists. catalog_changes_since answers every `since` below the reset entry
+    with reset=True, telling the client to bootstrap from the snapshot again.
+    """
+    try:
+        conn.execute('SELECT 1 FROM catalog_changes LIMIT 1')
+    except sqlite3.DatabaseError:
+        return  # created empty by init_db; nothing to reset
+    version = max(live_version, _catalog_version(conn))
+    if not conn.execute("UPDATE sqlite_sequence SET seq = ? WHERE name = 'catalog_changes'", (version,)).rowcount:
+        conn.execute("INSERT INTO sqlite_sequence (name, seq) VALUES ('catalog_changes', ?)", (version,))
+    conn.execute(
+        'INSERT INTO catalog_changes (entity, entity_id, op, data, changed_at) VALUES (?, ?, ?, NULL, ?)',
+        ('catalog', 0, CATALOG_RESET_OP, datetime.now().isoformat(sep=' '))
+    )
+
+
+def _clear_detail_cache_dir():
+    cache_dir = Config.DETAIL_CACHE_DIR
+    if not cache_dir or not os.path.isdir(cache_dir):
+        return
+    for name in os.listdir(cache_dir):
+        if name.endswith(('.json', '.tmp')):
+            _remove(os.path.join(cache_dir, name))
+
+
+def restore_backup(path, target=None, safety_backup=True):
+    """Replace the database at `target` (default Config.DATABASE) with a backup.
+
+    The backup is integrity-checked first, and the current database is backed
+    up to BACKUP_DIR unless `safety_backup` is False. Stop the app and workers
+    first: requests in flight during the restore may fail.
+
+    Quotation ids issued after the backup are reused, so the detail-cache
+    disk tier is emptied and the epoch bumped for memory tiers. Catalog sync
+    clients that synced past the backup are told to re-snapshot (see
+    _mark_catalog_reset).
+    """
+    target = target or Config.DATABASE
+    with _plain_copy(path) as plain:
+        integrity, _ = _check(plain)
+        if integrity != ['ok']:
+            raise BackupError('backup failed integrity check: ' + '; '.join(integrity[:5]))
+
+        safety = None
+        live_epoch = live_catalog = 0
+        if os.path.exists(target):
+            if safety_backup:
+                safety = create_backup(pause=0, source=target)['file']
+            conn = sqlite3.connect(target, timeout=30)
+            live_epoch = _read_epoch(conn)
+            live_catalog = _catalog_version(conn)
+            conn.close()
+
+        src = sqlite3.connect(plain)
+        dst = sqlite3.connect(target, timeout=30, isolation_level=None)
+        try:
+            src.backup(dst)
+            dst.execute(f'PRAGMA journal_mode={Config.SQLITE_JOURNAL_MODE}')
+            # Detail caches in running processes must not serve pre-restore bodies
+            epoch = str(max(live_epoch, _read_epoch(dst)) + 1)
+            if not dst.execute('UPDATE metadata SET value = ? WHERE key = ?', (epoch, EPOCH_KEY)).rowcount:
+                dst.execute('INSERT INTO metadata (key, value) VALUES (?, ?)', (EPOCH_KEY, epoch))
+            _mark_catalog_reset(dst, live_catalog)
+        finally:
+            src.close()
+            dst.close()
+    _clear_detail_cache_dir()
+    return {'restored_from': os.path.basename(path), 'target': target, 'safety_backup': safety}
+
+
+def list_backups(dest_dir=None):
+    """Stored backups, newest first."""
+    dest_dir = dest_dir or Config.BACKUP_DIR
+    if not os.path.isdir(dest_dir):
+        return []
+    backups = []
+    for name in sorted(_backup_files(dest_dir), reverse=True):
+        stat = os.stat(os.path.join(dest_dir, name))
+        backups.append({
+            'file': name,
+            'bytes': stat.st_size,
+            'created_at': datetime.fromtimestamp(stat.st_mtime).isoformat(timespec='seconds')
+        })
+    return backups
+
+
+def backup_path(name, dest_dir=None):
+    """Path of a stored backup by file name, or None if it is not one."""
+    dest_dir = dest_dir or Config.BACKUP_DIR
+    if name not in _backup_files(dest_dir):
+        return None
+    return os.path.join(dest_dir, name)
+
+
+def _backup_files(dest_dir):
+    if not os.path.isdir(dest_dir):
+        return []
+    return [n for n in os.listdir(dest_dir) if n.startswith(PREFIX) and n.endswith(('.db', '.db.gz'))]
+
+
+def prune_backups(dest_dir=None):
+    dest_dir = dest_dir or Config.BACKUP_DIR
+    for name in sorted(_backup_files(dest_dir))[:-Config.BACKUP_RETENTION or None]:
+        _remove(os.path.join(dest_dir, name))
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
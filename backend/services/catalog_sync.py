@@ -0,0 +1,116 @@
+"""
+Catalog change log and delta sync.
+
+Every ORM insert, update and delete of an Engine, Part or EnginePart row
+appends a row to `catalog_changes` in the same transaction. The change id
+is the catalog version: clients bootstrap from `catalog_snapshot` and then
+apply `catalog_changes_since(version)` to stay current. SQLite serializes
+writers, so versions are assigned in commit order and a client can never
+skip a change by syncing past it.
+
+Writes that bypass the ORM (Core `insert()`/`bulk_insert_mappings`) are not
+logged, so catalog maintenance must go through ORM objects.
+
+Restoring a backup rolls the log back and appends a 'reset' entry (see
+services/backup.py); clients whose version is below it get reset=True and
+must bootstrap from the snapshot again.
+"""
+import json
+from datetime import datetime
+from sqlalchemy import event, func, inspect
+from models import Engine, Part, EnginePart, CatalogChange
+
+# entity name -> (model, columns sent to clients, in snapshot order)
+CATALOG_ENTITIES = {
+    'engine': (Engine, ('id', 'category', 'engine_name', 'parent_id')),
+    'part': (Part, ('id', 'part_no', 'part_name', 'price')),
+    'engine_part': (EnginePart, ('id', 'engine_id', 'part_id')),
+}
+_ENTITY_BY_MODEL = {model: name for name, (model, _) in CATALOG_ENTITIES.items()}
+RESET_OP = 'reset'
+
+
+def _row_data(entity, target):
+    _, columns = CATALOG_ENTITIES[entity]
+    return {col: getattr(target, col) for col in columns}
+
+
+def _log_change(connection, entity, target, op):
+    connection.execute(CatalogChange.__table__.insert().values(
+        entity=entity,
+        entity_id=target.id,
+        op=op,
+        data=None if op == 'delete' else json.dumps(_row_data(entity, target)),
+        changed_at=datetime.now()
+    ))
+
+
+def _register(model, entity):
+    @event.listens_for(model, 'after_insert')
+    def after_insert(mapper, connection, target):
+        _log_change(connection, entity, target, 'insert')
+
+    @event.listens_for(model, 'after_update')
+    def after_update(mapper, connection, target):
+        # after_update also fires for dirty objects without net column changes
+        state = inspect(target)
+        if any(state.attrs[col].history.has_changes() for col in CATALOG_ENTITIES[entity][1]):
+            _log_change(connection, entity, target, 'update')
+
+    @event.listens_for(model, 'after_delete')
+    def after_delete(mapper, connection, target):
+        _log_change(connection, entity, target, 'delete')
+
+
+for _model, _entity in _ENTITY_BY_MODEL.items():
+    _register(_model, _entity)
+
+
+def current_version(session):
+    """Latest catalog version (0 before any logged change)."""
+    return session.query(func.max(CatalogChange.id)).scalar() or 0
+
+
+def catalog_changes_since(session, since, limit):
+    """Changes after `since`, at most `limit` log entries, collapsed per row.
+
+    Returns {'since', 'version', 'latest', 'more', 'reset', 'changes'}; the
+    client stores `version` and asks again while `more` is true. reset=True
+    means the database was restored from a backup: discard the local catalog
+    and fetch the snapshot.
+    """
+    rows = session.query(CatalogChange).filter(CatalogChange.id > since).order_by(CatalogChange.id).limit(limit).all()
+    latest = current_version(session)
+    if any(row.op == RESET_OP for row in rows):
+        return {'since': since, 'version': latest, 'latest': latest, 'more': False, 'reset': True, 'changes': []}
+    version = rows[-1].id if rows else max(since, 0)
+    # Keep only the last change per row; an insert followed by updates is still an upsert
+    collapsed = {}
+    for row in rows:
+        collapsed.pop((row.entity, row.entity_id), None)
+        collapsed[(row.entity, row.entity_id)] = row
+    changes = [
+        {
+            'v': row.id,
+            'entity': row.entity,
+            'id': row.entity_id,
+            'op': row.op,
+            'data': json.loads(row.data) if row.data else None
+        }
+        for row in collapsed.values()
+    ]
+    return {'since': since, 'version': version, 'latest': latest, 'more': version < latest, 'reset': False,
+            'changes': changes}
+
+
+def catalog_snapshot(session):
+    """Full catalog as compact row arrays plus the version it corresponds to.
+
+    Reads run in one transaction, so the version matches the rows returned.
+    """
+    snapshot = {'version': current_version(session), 'columns': {}}
+    for entity, (model, columns) in CATALOG_ENTITIES.items():
+        snapshot['columns'][entity] = list(columns)
+        cols = [getattr(model, col) for col in columns]
+        snapshot[entity] = [list(row) for row in session.query(*cols).order_by(model.id).all()]
+    return snapshot
@@ -0,0 +1,223 @@
+"""
+Cache of finished quotation detail payloads.
+
+Quotations never change after creation, so the serialized JSON returned by
+GET /api/quotations/<id> is cached in a memory-bounded LRU keyed by
+quotation id, with an optional on-disk tier (`DETAIL_CACHE_DIR`). Admin
+corrections must call `invalidate_quotations(ids)` after changing quotations.
+
+The memory tier is per process. Invalidations also bump a counter in the
+`metadata` table, which every process polls at most once per
+`DETAIL_CACHE_EPOCH_CHECK` seconds, so corrections made by a background
+worker reach the web processes too.
+
+A body built on a miss may predate an invalidation that lands while it is
+being built, so callers take `fill_token()` before reading the database
+and pass it to `put()`, which drops the body if anything was invalidated
+meanwhile.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+from sqlalchemy import cast, Integer, String
+from config import Config
+from database import get_db_session
+from models import Metadata
+
+EPOCH_KEY = 'detail_cache_epoch'
+_UNSET = object()
+
+
+class QuotationDetailCache:
+    """Byte-bounded LRU of serialized detail payloads with hit-rate metrics."""
+
+    def __init__(self, max_bytes=None, disk_dir=None):
+        self.max_bytes = max_bytes if max_bytes is not None else Config.DETAIL_CACHE_MAX_BYTES
+        self.disk_dir = disk_dir if disk_dir is not None else Config.DETAIL_CACHE_DIR
+        if self.disk_dir:
+            os.makedirs(self.disk_dir, exist_ok=True)
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._counters = {'hits': 0, 'disk_hits': 0, 'misses': 0, 'evictions': 0, 'invalidations': 0}
+        self._epoch = _UNSET
+        self._epoch_checked = 0.0
+        self._generation = 0  # bumped by every local invalidate/clear
+
+    def get(self, qid):
+        """Return the cached payload bytes, or None on a miss."""
+        self._check_epoch()
+        with self._lock:
+            body = self._entries.get(qid)
+            if body is not None:
+                self._entries.move_to_end(qid)
+                self._counters['hits'] += 1
+                return body
+        body = self._read_disk(qid)
+        with self._lock:
+            if body is None:
+                self._counters['misses'] += 1
+                return None
+            self._counters['disk_hits'] += 1
+            self._store(qid, body)
+        return body
+
+    def fill_token(self, session=None):
+        """Take before building a body on a miss; pass to put().
+
+        Pass the session the body is read with, so the epoch comes from the
+        same snapshot as the body.
+        """
+        return self._generation, _read_epoch(session)
+
+    def put(self, qid, body, token=None):
+        """Cache a serialized payload (bytes) in memory and on disk.
+
+        With a `token` from fill_token(), the body is dropped if an
+        invalidation happened (in any process) since the token was taken.
+        """
+        if token is not None and _read_epoch() != token[1]:
+            return
+        with self._lock:
+            if token is not None and self._generation != token[0]:
+                return
+            self._store(qid, body)
+        self._write_disk(qid, body)
+        if token is not None and self.disk_dir and _read_epoch() != token[1]:
+            # Invalidated while writing: invalidate_quotations bumps the epoch
+            # before deleting files, so either it removed ours or we do
+            self._remove_disk(qid)
+
+    def invalidate(self, qid):
+        """Drop a quotation from both tiers (call after an admin correction)."""
+        with self._lock:
+            body = self._entries.pop(qid, None)
+            if body is not None:
+                self._bytes -= len(body)
+            self._generation += 1
+            self._counters['invalidations'] += 1
+        self._remove_disk(qid)
+
+    def _check_epoch(self):
+        """Clear the memory tier if another process has invalidated entries."""
+        now = time.monotonic()
+        if now - self._epoch_checked < Config.DETAIL_CACHE_EPOCH_CHECK:
+            return
+        self._epoch_checked = now
+        epoch = _read_epoch()
+        if self._epoch is not _UNSET and epoch != self._epoch:
+            self.clear()
+        self._epoch = epoch
+
+    def _own_bump(self, previous, epoch):
+        # Our own invalidation needs no flush; one by another process still does
+        if self._epoch == previous:
+            self._epoch = epoch
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self._generation += 1
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._counters)
+            stats.update(entries=len(self._entries), bytes=self._bytes, max_bytes=self.max_bytes,
+                         disk_tier=bool(self.disk_dir))
+        lookups = stats['hits'] + stats['disk_hits'] + stats['misses']
+        stats['hit_rate'] = round((stats['hits'] + stats['disk_hits']) / lookups, 4) if lookups else 0.0
+        return stats
+
+    def _store(self, qid, body):
+        # Caller holds the lock
+        if len(body) > self.max_bytes:
+            return
+        old = self._entries.pop(qid, None)
+        if old is not None:
+            self._bytes -= len(old)
+        self._entries[qid] = body
+        self._bytes += len(body)
+        while self._bytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= len(evicted)
+            self._counters['evictions'] += 1
+
+    def _disk_path(self, qid):
+        return os.path.join(self.disk_dir, f'{int(qid)}.json')
+
+    def _read_disk(self, qid):
+        if not self.disk_dir:
+            return None
+        try:
+            with open(self._disk_path(qid), 'rb') as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def _remove_disk(self, qid):
+        if not self.disk_dir:
+            return
+        try:
+            os.remove(self._disk_path(qid))
+        except FileNotFoundError:
+            pass
+
+    def _write_disk(self, qid, body):
+        if not self.disk_dir:
+            return
+        # Write then rename so readers never see a partial file
+        path = self._disk_path(qid)
+        tmp = f'{path}.{threading.get_ident()}.tmp'
+        with open(tmp, 'wb') as f:
+            f.write(body)
+        os.replace(tmp, path)
+
+
+def _read_epoch(session=None):
+    if session is not None:
+        return session.query(Metadata.value).filter_by(key=EPOCH_KEY).scalar()
+    session = get_db_session()
+    try:
+        return session.query(Metadata.value).filter_by(key=EPOCH_KEY).scalar()
+    finally:
+        session.close()
+
+
+def _bump_epoch():
+    """Increment the epoch; returns (previous, new) values."""
+    session = get_db_session()
+    try:
+        updated = session.query(Metadata).filter_by(key=EPOCH_KEY).update(
+            {'value': cast(cast(Metadata.value, Integer) + 1, String)}, synchronize_session=False
+        )
+        if not updated:
+            session.add(Metadata(key=EPOCH_KEY, value='1'))
+        epoch = session.query(Metadata.value).filter_by(key=EPOCH_KEY).scalar()
+        session.commit()
+        return (str(int(epoch) - 1) if updated else None), epoch
+    except Exception:
+        session.rollback()
+        raise
+    finally:
+        session.close()
+
+
+detail_cache = QuotationDetailCache()
+
+
+def invalidate_quotations(qids):
+    """Invalidation hook for code that corrects stored quotations (any process)."""
+    qids = list(qids)
+    if not qids:
+        return
+    # Bump first: put() re-checks the epoch after writing to disk (see put)
+    previous, epoch = _bump_epoch()
+    for qid in qids:
+        detail_cache.invalidate(qid)
+    detail_cache._own_bump(previous, epoch)
+
+
+def invalidate_quotation(qid):
+    invalidate_quotations([qid])
@@ -0,0 +1,112 @@
+"""
+Background job handlers. Importing this module registers them with the queue.
+"""
+import time
+from sqlalchemy import func
+from database import get_db_session, IN_CHUNK_SIZE
+from models import Quotation, QuotationItem
+from services.job_queue import job_handler
+from services.write_queue import run_write
+from services.quote_service import compute_totals
+from services.detail_cache import invalidate_quotations
+from services.backup import create_backup
+from services.user_import import import_users
+
+
+def _recompute_batch(db, batch):
+    """Fix stored totals for one batch of quotation ids; returns the changed ids."""
+    subtotals = dict(
+        db.query(QuotationItem.quotation_id, func.sum(QuotationItem.qty * QuotationItem.price))
+        .filter(QuotationItem.quotation_id.in_(batch))
+        .group_by(QuotationItem.quotation_id)
+        .all()
+    )
+    changed = []
+    for q in db.query(Quotation).filter(Quotation.id.in_(batch)).all():
+        subtotal = subtotals.get(q.id) or 0.0
+        discount_amount, vat_amount, total = compute_totals(subtotal, q.discount_percent)
+        values = (round(total, 2), round(subtotal, 2), round(discount_amount, 2), round(vat_amount, 2))
+        if (q.total, q.subtotal, q.discount_amount, q.vat_amount) != values:
+            q.total, q.subtotal, q.discount_amount, q.vat_amount = values
+            changed.append(q.id)
+    return changed
+
+
+@job_handler('recompute_quotation_totals')
+def recompute_quotation_totals(payload, job):
+    """Recompute stored quotation totals from their line items.
+    Corrected quotations are evicted from the detail cache.
+
+    Payload: {"quotation_ids": [..]} (optional; all quotations when omitted)
+    """
+    batch_size = 200
+    session = get_db_session()
+    try:
+        wanted = payload.get('quotation_ids')
+        if wanted:
+            wanted = sorted(set(wanted))
+            ids = []
+            for start in range(0, len(wanted), IN_CHUNK_SIZE):
+                chunk = wanted[start:start + IN_CHUNK_SIZE]
+                ids.extend(qid for (qid,) in session.query(Quotation.id).filter(Quotation.id.in_(chunk)).all())
+            ids.sort()
+        else:
+            ids = [row.id for row in session.query(Quotation.id).order_by(Quotation.id).all()]
+    finally:
+        session.close()
+
+    updated = []
+    for start in range(0, len(ids), batch_size):
+        batch = ids[start:start + batch_size]
+        # Each batch reads then writes, so it must take the write lock up front
+        changed = run_write(lambda db, batch=batch: _recompute_batch(db, batch))
+        invalidate_quotations(changed)
+        updated.extend(changed)
+        job.progress(100.0 * (start + len(batch)) / len(ids), f'{start + len(batch)}/{len(ids)} quotations')
+    return {'checked': len(ids), 'updated': len(updated)}
+
+
+@job_handler('backup_database')
+def backup_database(payload, job):
+    """Online backup of the database to Config.BACKUP_DIR (see services/backup.py).
+
+    Payload: {"compress": bool} (optional; Config.BACKUP_COMPRESS when omitted)
+    """
+    last_report = [0.0]
+
+    def progress(copied, total):
+        # Throttled: each report is a write, and the backup should stay light
+        now = time.monotonic()
+        if total and now - last_report[0] >= 2.0:
+            last_report[0] = now
+            job.progress(100.0 * copied / total, f'{copied}/{total} pages')
+
+    result = create_backup(compress=payload.get('compress'), progress=progress)
+    result.pop('path')
+    return result
+
+
+@job_handler('import_users')
+def import_users_job(payload, job):
+    """Bulk staff import (see services/user_import.py); the result lists every row.
+
+    Payload: {"users": [{username, password, role, branch}, ..]}
+    The initial passwords are removed from the stored payload when the job
+    ends, so enqueue it with max_attempts=1: a retry would find no rows.
+    """
+    rows = payload.get('users')
+    if not isinstance(rows, list) or not rows:
+        raise ValueError('users must be a non-empty list')
+    last_report = [0.0]
+
+    def progress(percent, message):
+        # Throttled: hashing reports after every row, and each report is a write
+        now = time.monotonic()
+        if now - last_report[0] >= 2.0:
+            last_report[0] = now
+            job.progress(percent, message)
+
+    try:
+        return import_users(rows, progress=progress)
+    finally:
+        job.replace_payload({'users': len(rows), 'passwords_removed': True})
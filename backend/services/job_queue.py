@@ -0,0 +1,284 @@
+"""
+Persistent background job queue backed by the `jobs` table.
+
+Slow work (bulk imports, recomputes, exports, rendering) is enqueued from a
+request and executed by worker processes started with `worker.py`. Every
+state change (claim, progress, finish, retry) is its own short transaction,
+so the SQLite write lock is never held while a handler runs.
+
+Handlers are registered by name:
+
+    @job_handler('recompute_quotation_totals')
+    def recompute(payload, job):
+        job.progress(50, 'halfway')
+        return {'updated': 10}
+
+The return value must be JSON-serializable and is stored as the job result.
+"""
+import json
+import logging
+import os
+import socket
+import time
+import traceback
+from datetime import datetime, timedelta
+from database import get_db_session, engine
+from models import Job
+from config import Config
+
+JOB_HANDLERS = {}
+
+
+def job_handler(kind):
+    """Register a function as the handler for jobs of the given kind."""
+    def decorator(func):
+        JOB_HANDLERS[kind] = func
+        return func
+    return decorator
+
+
+def enqueue(kind, payload=None, priority=0, max_attempts=3, created_by=None):
+    """Add a job to the queue and return its id."""
+    if kind not in JOB_HANDLERS:
+        raise ValueError(f'unknown job kind: {kind}')
+    session = get_db_session()
+    try:
+        job = Job(
+            kind=kind,
+            payload=json.dumps(payload or {}),
+            priority=int(priority),
+            max_attempts=max(1, int(max_attempts)),
+            created_by=created_by
+        )
+        session.add(job)
+        session.commit()
+        return job.id
+    except Exception:
+        session.rollback()
+        raise
+    finally:
+        session.close()
+
+
+def get_job(job_id):
+    """Return the job as a dict, or None if it does not exist."""
+    session = get_db_session()
+    try:
+        job = session.query(Job).filter_by(id=job_id).first()
+        return job_to_dict(job) if job else None
+    finally:
+        session.close()
+
+
+def job_to_dict(job):
+    """Serialize a Job row for the status API."""
+    def fmt(dt):
+        return dt.isoformat(timespec='seconds') if dt else None
+    return {
+        'id': job.id,
+        'kind': job.kind,
+        'status': job.status,
+        'priority': job.priority,
+        'attempts': job.attempts,
+        'max_attempts': job.max_attempts,
+        'progress': round(job.progress or 0.0, 1),
+        'message': job.message,
+        'result': json.loads(job.result) if job.result else None,
+        'error': job.error,
+        'created_by': job.created_by,
+        'created_at': fmt(job.created_at),
+        'started_at': fmt(job.started_at),
+        'finished_at': fmt(job.finished_at)
+    }
+
+
+class JobContext:
+    """Handle passed to a running handler for progress reporting."""
+
+    def __init__(self, job_id, worker_name):
+        self.id = job_id
+        self.worker_name = worker_name
+
+    def progress(self, percent, message=None):
+        """Record progress and renew the lease. One short write per call."""
+        _update_job(
+            self.id,
+            progress=max(0.0, min(100.0, float(percent))),
+            message=message[:255] if message else None,
+            locked_until=_lease_deadline()
+        )
+
+    def replace_payload(self, payload):
+        """Overwrite the stored payload, e.g. to drop secrets the job no longer needs."""
+        _update_job(self.id, payload=json.dumps(payload))
+
+
+def _lease_deadline():
+    return datetime.now() + timedelta(seconds=Config.JOB_LEASE_SECONDS)
+
+
+def _update_job(job_id, **values):
+    """Apply a single job-state update in its own transaction."""
+    session = get_db_session()
+    try:
+        session.query(Job).filter_by(id=job_id).update(values, synchronize_session=False)
+        session.commit()
+    except Exception:
+        session.rollback()
+        raise
+    finally:
+        session.close()
+
+
+def requeue_expired():
+    """Return running jobs whose lease has expired (e.g. a crashed worker) to the queue.
+
+    Jobs that have used all their attempts are marked failed instead, so a
+    job that keeps killing its worker is not retried forever.
+    """
+    session = get_db_session()
+    try:
+        now = datetime.now()
+        expired = (Job.status == 'running', Job.locked_until < now)
+        failed = session.query(Job).filter(*expired, Job.attempts >= Job.max_attempts).update({
+            'status': 'failed',
+            'error': 'lease expired: the worker stopped while running the job',
+            'worker': None,
+            'locked_until': None,
+            'finished_at': now
+        }, synchronize_session=False)
+        requeued = session.query(Job).filter(*expired).update(
+            {'status': 'queued', 'worker': None, 'locked_until': None}, synchronize_session=False
+        )
+        session.commit()
+        return requeued + failed
+    except Exception:
+        session.rollback()
+        raise
+    finally:
+        session.close()
+
+
+def claim_next(worker_name):
+    """Claim the highest-priority runnable job. Returns (id, kind, payload) or None.
+
+    The candidate is read first and then claimed with a conditional UPDATE,
+    so the write transaction covers a single row update and two workers
+    can never claim the same job.
+    """
+    session = get_db_session()
+    try:
+        while True:
+            now = datetime.now()
+            candidate = session.query(Job.id, Job.kind, Job.payload).filter(
+                Job.status == 'queued', Job.run_after <= now
+            ).order_by(Job.priority.desc(), Job.id).first()
+            session.commit()  # end the read transaction before writing
+            if not candidate:
+                return None
+            claimed = session.query(Job).filter(
+                Job.id == candidate.id, Job.status == 'queued'
+            ).update({
+                'status': 'running',
+                'attempts': Job.attempts + 1,
+                'worker': worker_name,
+                'locked_until': _lease_deadline(),
+                'started_at': now
+            }, synchronize_session=False)
+            session.commit()
+            if claimed:
+                return candidate.id, candidate.kind, json.loads(candidate.payload or '{}')
+            # Another worker won the race; try the next candidate.
+    except Exception:
+        session.rollback()
+        raise
+    finally:
+        session.close()
+
+
+def run_job(job_id, kind, payload, worker_name):
+    """Execute a claimed job and record its outcome."""
+    handler = JOB_HANDLERS.get(kind)
+    try:
+        if handler is None:
+            raise ValueError(f'no handler registered for job kind: {kind}')
+        result = json.dumps(handler(payload, JobContext(job_id, worker_name)))
+    except Exception:
+        _record_failure(job_id, traceback.format_exc())
+        return False
+    _update_job(
+        job_id,
+        status='done',
+        progress=100.0,
+        result=result,
+        error=None,
+        locked_until=None,
+        finished_at=datetime.now()
+    )
+    return True
+
+
+def _record_failure(job_id, error):
+    """Schedule a retry with exponential backoff, or mark the job failed."""
+    session = get_db_session()
+    try:
+        attempts, max_attempts = session.query(Job.attempts, Job.max_attempts).filter_by(id=job_id).one()
+        session.commit()
+    finally:
+        session.close()
+    if attempts < max_attempts:
+        delay = Config.JOB_RETRY_BACKOFF * (2 ** (attempts - 1))
+        _update_job(
+            job_id,
+            status='queued',
+            error=error,
+            worker=None,
+            locked_until=None,
+            run_after=datetime.now() + timedelta(seconds=delay)
+        )
+    else:
+        _update_job(
+            job_id,
+            status='failed',
+            error=error,
+            locked_until=None,
+            finished_at=datetime.now()
+        )
+
+
+def run_worker(stop_event=None, poll_interval=None):
+    """Worker process main loop: claim and run jobs until `stop_event` is set."""
+    # Connections must not be shared with the parent process after fork.
+    engine.dispose(close=False)
+    worker_name = f'{socket.gethostname()}:{os.getpid()}'
+    poll_interval = poll_interval or Config.JOB_POLL_INTERVAL
+    last_reap = 0.0
+    failures = 0
+    while not (stop_event and stop_event.is_set()):
+        try:
+            if time.monotonic() - last_reap > Config.JOB_LEASE_SECONDS / 4:
+                requeue_expired()
+                last_reap = time.monotonic()
+            claimed = claim_next(worker_name)
+            if claimed is not None:
+                run_job(*claimed, worker_name)
+            failures = 0
+        except Exception:
+            # e.g. "database is locked": keep the worker alive and back off.
+            # A job interrupted here is re-queued once its lease expires.
+            failures += 1
+            logging.exception('Job worker %s: error in main loop', worker_name)
+            claimed = None
+        if claimed is None:
+            _idle(stop_event, min(poll_interval * 2 ** failures, 60.0) if failures else poll_interval)
+
+
+def _idle(stop_event, seconds):
+    # Poll instead of stop_event.wait(): a multiprocessing.Event whose waiter
+    # was killed (e.g. SIGKILL) blocks every later set() forever.
+    deadline = time.monotonic() + seconds
+    while not (stop_event and stop_event.is_set()):
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return
+        time.sleep(min(remaining, 0.2))
@@ -0,0 +1,147 @@
+"""
+Batch part-number resolution for pasted bills of materials.
+Resolves hundreds of part numbers with chunked `IN` lookups on the unique
+`parts.part_no` index instead of one ILIKE search per part.
+"""
+import bisect
+import difflib
+import math
+import re
+from database import IN_CHUNK_SIZE
+from models import Part
+from services.catalog_sync import current_version
+
+MAX_SUGGESTIONS = 3
+_NON_ALNUM = re.compile(r'[^0-9A-Z]')
+SUGGESTION_WINDOW = 10  # sorted neighbours on each side compared for fuzzy matches
+
+# (catalog version, {normalized part_no: [ids]}, sorted normalized part_nos)
+_suggest_index = (None, None, None)
+
+
+def normalize_part_no(part_no):
+    """Loose form used for near-miss matching: uppercase, alphanumerics only."""
+    return _NON_ALNUM.sub('', str(part_no).upper())
+
+
+def parse_bom_entries(entries):
+    """Turn request entries into an ordered {part_no: qty} dict.
+
+    Each entry is either a part number (string or number) or
+    {"part_no": .., "qty": ..}. Duplicate part numbers are merged by summing
+    their quantities. Raises ValueError on malformed entries.
+    """
+    wanted = {}
+    for entry in entries:
+        if isinstance(entry, dict):
+            part_no = entry.get('part_no')
+            qty = entry.get('qty', 1)
+        else:
+            part_no, qty = entry, 1
+        # bool is an int subclass, but true/false is never a part number or quantity
+        if part_no is not None and (isinstance(part_no, bool) or not isinstance(part_no, (str, int, float))):
+            raise ValueError('each entry must be a part number or {"part_no": .., "qty": ..}')
+        part_no = str(part_no if part_no is not None else '').strip()
+        if not part_no:
+            raise ValueError('every entry needs a part_no')
+        if isinstance(qty, bool):
+            raise ValueError(f'invalid qty for {part_no}')
+        try:
+            qty = float(qty)
+        except (TypeError, ValueError):
+            raise ValueError(f'invalid qty for {part_no}')
+        if not math.isfinite(qty):
+            raise ValueError(f'invalid qty for {part_no}')
+        if qty < 1:
+            raise ValueError(f'qty for {part_no} must be >=1')
+        wanted[part_no] = wanted.get(part_no, 0) + qty
+    return wanted
+
+
+# Plain column tuples are much cheaper to load than ORM entities for large BOMs
+PART_COLUMNS = (Part.id, Part.part_no, Part.part_name, Part.price)
+
+
+def _part_dict(p):
+    return {'id': p.id, 'part_no': p.part_no, 'part_name': p.part_name, 'price': round(p.price, 2)}
+
+
+def resolve_part_numbers(session, wanted):
+    """Resolve an ordered {part_no: qty} dict against the parts table.
+
+    Returns {'parts': [...], 'missing': [...]} in request order. Each miss
+    carries up to MAX_SUGGESTIONS near matches (case/punctuation variants
+    first, then close spellings).
+    """
+    part_nos = list(wanted)
+    found = {}
+    for start in range(0, len(part_nos), IN_CHUNK_SIZE):
+        chunk = part_nos[start:start + IN_CHUNK_SIZE]
+        for p in session.query(*PART_COLUMNS).filter(Part.part_no.in_(chunk)).all():
+            found[p.part_no] = p
+
+    parts = []
+    misses = []
+    for part_no in part_nos:
+        p = found.get(part_no)
+        if p:
+            parts.append(dict(_part_dict(p), qty=wanted[part_no]))
+        else:
+            misses.append(part_no)
+
+    suggestions = _suggest(session, misses) if misses else {}
+    missing = [
+        {'part_no': part_no, 'qty': wanted[part_no], 'suggestions': suggestions.get(part_no, [])}
+        for part_no in misses
+    ]
+    return {'parts': parts, 'missing': missing}
+
+
+def _load_suggest_index(session):
+    """Normalized part numbers for near-miss lookups, rebuilt when the catalog version changes.
+
+    Reads only (id, part_no), which SQLite serves from the unique index.
+    Catalog writes that bypass the ORM do not change the version (see
+    services/catalog_sync.py), so they are not seen until the next one.
+    """
+    global _suggest_index
+    version = current_version(session)
+    cached_version, by_norm, sorted_norms = _suggest_index
+    if cached_version == version:
+        return by_norm, sorted_norms
+    by_norm = {}
+    for pid, part_no in session.query(Part.id, Part.part_no).all():
+        by_norm.setdefault(normalize_part_no(part_no), []).append(pid)
+    sorted_norms = sorted(by_norm)
+    _suggest_index = (version, by_norm, sorted_norms)
+    return by_norm, sorted_norms
+
+
+def _suggest(session, misses):
+    """Find near matches for unresolved part numbers.
+
+    The sorted index of normalized part numbers is built once per catalog
+    version; after that, each miss is a dict lookup plus a fuzzy comparison
+    with its SUGGESTION_WINDOW sorted neighbours on each side.
+    """
+    by_norm, sorted_norms = _load_suggest_index(session)
+
+    picked = {}
+    for part_no in misses:
+        norm = normalize_part_no(part_no)
+        ids = list(by_norm.get(norm, []))
+        if len(ids) < MAX_SUGGESTIONS and norm:
+            pos = bisect.bisect_left(sorted_norms, norm)
+            window = sorted_norms[max(0, pos - SUGGESTION_WINDOW):pos + SUGGESTION_WINDOW]
+            for close in difflib.get_close_matches(norm, window, n=MAX_SUGGESTIONS, cutoff=0.75):
+                ids.extend(i for i in by_norm[close] if i not in ids)
+        if ids:
+            picked[part_no] = ids[:MAX_SUGGESTIONS]
+
+    all_ids = sorted({i for ids in picked.values() for i in ids})
+    rows = {}
+    for start in range(0, len(all_ids), IN_CHUNK_SIZE):
+        chunk = all_ids[start:start + IN_CHUNK_SIZE]
+        for p in session.query(*PART_COLUMNS).filter(Part.id.in_(chunk)).all():
+            rows[p.id] = _part_dict(p)
+    return {part_no: [rows[i] for i in ids if i in rows] for part_no, ids in picked.items()}
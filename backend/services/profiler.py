@@ -0,0 +1,231 @@
+"""
+Opt-in per-request profiling.
+
+A request is profiled when an admin sends `X-Profile: 1`, or when it falls
+in the sampled percentage an admin set via PUT /api/admin/profiles/settings.
+Profiled requests run under cProfile and record every SQL statement with its
+duration; the report is written to `PROFILE_DIR` as `<id>.json` plus a
+`<id>.prof` pstats dump (open with snakeviz or `python -m pstats`), keeping
+the newest `PROFILE_RETENTION` reports.
+
+Streamed responses (e.g. large quotation details) stay profiled until the
+server closes them, so the report covers the queries and serialization
+that run while the body is sent.
+
+The hooks are registered only when PROFILING_ENABLED is set (off by
+default). Once registered they run on every request; when no request is
+being profiled no SQL listeners are attached, and the per-request cost is
+three hook calls, a header lookup and a random draw.
+
+Only one request per process is profiled at a time: Python 3.12+ allows a
+single active profiler per interpreter (and it sees every thread, so the
+call stats of a report can include other requests served meanwhile). A
+request that would be profiled while another one is, or while an external
+profiler is active, simply runs unprofiled.
+"""
+import cProfile
+import io
+import json
+import os
+import pstats
+import random
+import threading
+import time
+import uuid
+from datetime import datetime
+from flask import g, request, session
+from sqlalchemy import event
+from config import Config
+from database import engine
+
+_local = threading.local()
+_listener_lock = threading.Lock()
+_profiler_lock = threading.Lock()
+_active_count = 0
+_settings = {'sample_percent': Config.PROFILE_SAMPLE_PERCENT}
+
+REPORT_ID_CHARS = set('0123456789abcdef-T')
+
+
+def get_sample_percent():
+    return _settings['sample_percent']
+
+
+def set_sample_percent(percent):
+    _settings['sample_percent'] = max(0.0, min(100.0, float(percent)))
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if getattr(_local, 'statements', None) is not None:
+        conn.info.setdefault('profile_start', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    statements = getattr(_local, 'statements', None)
+    starts = conn.info.get('profile_start')
+    if statements is None or not starts:
+        return
+    statements.append({
+        'sql': statement,
+        'ms': round((time.perf_counter() - starts.pop()) * 1000, 3),
+        'executemany': executemany
+    })
+
+
+def _attach_listeners():
+    global _active_count
+    with _listener_lock:
+        _active_count += 1
+        if _active_count == 1:
+            event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+            event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+
+
+def _detach_listeners():
+    global _active_count
+    with _listener_lock:
+        _active_count -= 1
+        if _active_count == 0:
+            event.remove(engine, 'before_cursor_execute', _before_cursor_execute)
+            event.remove(engine, 'after_cursor_execute', _after_cursor_execute)
+
+
+def _should_profile():
+    if request.headers.get('X-Profile') == '1' and session.get('role') == 'admin':
+        return True
+    percent = _settings['sample_percent']
+    return percent > 0 and random.random() * 100 < percent
+
+
+def _start_profile():
+    if not _should_profile() or not _profiler_lock.acquire(blocking=False):
+        return
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError:
+        # Another profiling tool is already active (Python 3.12+)
+        _profiler_lock.release()
+        return
+    _local.statements = []
+    _attach_listeners()
+    g.profile_started = time.perf_counter()
+    g.profiler = profiler
+
+
+def _finish_profile(response):
+    profiler = g.pop('profiler', None)
+    if profiler is None:
+        return response
+    started = g.pop('profile_started')
+    report_id = new_report_id()
+    info = {
+        'method': request.method,
+        'path': request.full_path.rstrip('?'),
+        'endpoint': request.endpoint,
+        'user': session.get('username'),
+        'status': response.status_code
+    }
+
+    def finish():
+        profiler.disable()
+        duration_ms = (time.perf_counter() - started) * 1000
+        statements = _local.statements
+        _local.statements = None
+        _detach_listeners()
+        _profiler_lock.release()
+        save_report(report_id, profiler, statements, duration_ms, info)
+
+    response.headers['X-Profile-Id'] = report_id
+    if response.is_streamed:
+        # The body's queries run while the server iterates it, after this hook
+        response.call_on_close(finish)
+    else:
+        finish()
+    return response
+
+
+def _abort_profile(exc):
+    # Request failed before after_request ran: drop the profile
+    profiler = g.pop('profiler', None)
+    if profiler is not None:
+        profiler.disable()
+        _local.statements = None
+        _detach_listeners()
+        _profiler_lock.release()
+
+
+def init_profiling(app):
+    """Register the profiling hooks unless PROFILING_ENABLED is off."""
+    if not app.config.get('PROFILING_ENABLED'):
+        return
+    app.before_request(_start_profile)
+    app.after_request(_finish_profile)
+    app.teardown_request(_abort_profile)
+
+
+def new_report_id():
+    return f"{datetime.now().strftime('%Y%m%dT%H%M%S%f')}-{uuid.uuid4().hex[:8]}"  # sorts chronologically
+
+
+def save_report(report_id, profiler, statements, duration_ms, info):
+    """Write the JSON report and pstats dump and prune old ones.
+
+    `info` holds the request's method, path, endpoint, user and status.
+    """
+    os.makedirs(Config.PROFILE_DIR, exist_ok=True)
+    base = os.path.join(Config.PROFILE_DIR, report_id)
+    profiler.dump_stats(base + '.prof')
+
+    out = io.StringIO()
+    pstats.Stats(profiler, stream=out).sort_stats('cumulative').print_stats(Config.PROFILE_TOP_FUNCTIONS)
+    report = {
+        'id': report_id,
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        **info,
+        'duration_ms': round(duration_ms, 3),
+        'sql_count': len(statements),
+        'sql_ms': round(sum(s['ms'] for s in statements), 3),
+        'sql': statements,
+        'call_stats': out.getvalue()
+    }
+    with open(base + '.json', 'w', encoding='utf-8') as f:
+        json.dump(report, f)
+    _prune_reports()
+
+
+def _prune_reports():
+    reports = sorted(name[:-5] for name in os.listdir(Config.PROFILE_DIR) if name.endswith('.json'))
+    for report_id in reports[:-Config.PROFILE_RETENTION or None]:
+        for ext in ('.json', '.prof'):
+            try:
+                os.remove(os.path.join(Config.PROFILE_DIR, report_id + ext))
+            except FileNotFoundError:
+                pass
+
+
+def report_path(report_id, ext):
+    """Path of a stored report file, or None if the id is invalid or missing."""
+    if not report_id or not set(report_id) <= REPORT_ID_CHARS:
+        return None
+    path = os.path.join(Config.PROFILE_DIR, report_id + ext)
+    return path if os.path.exists(path) else None
+
+
+def list_reports():
+    """Summaries of stored reports, newest first."""
+    if not os.path.isdir(Config.PROFILE_DIR):
+        return []
+    summaries = []
+    for name in sorted(os.listdir(Config.PROFILE_DIR), reverse=True):
+        if not name.endswith('.json'):
+            continue
+        try:
+            with open(os.path.join(Config.PROFILE_DIR, name), encoding='utf-8') as f:
+                report = json.load(f)
+        except (OSError, ValueError):
+            continue
+        summaries.append({key: report.get(key) for key in (
+            'id', 'created_at', 'method', 'path', 'user', 'status', 'duration_ms', 'sql_count', 'sql_ms'
+        )})
+    return summaries
@@ -1,50 +1,355 @@
 """
 Quote number generation service.
-Generates auto-incrementing quote numbers in format: QTN/TEST/YYYY/INC
-where INC is zero-padded to 3 digits and increments per quote per year.
-Example: QTN/TEST/2025/001, QTN/TEST/2025/002
+Generates auto-incrementing quote numbers per branch, by default in format:
+QTN/<BRANCH>/YYYY/INC where INC is zero-padded to 3 digits and increments
+per quote per branch per year. Format and pad width come from Config and
+can be overridden per Branch.
+Example: QTN/TEST/2025/001, QTN/TEST/2025/002, QTN/KTM/2025/001
+Also builds quotation records and the engine/part lookups used by the routes.
 """
 from datetime import datetime
-from database import get_db_session
-from models import Metadata, Engine, EnginePart, Part
+from sqlalchemy import cast, func, Integer, String
+from config import Config
+from database import get_db_session, IN_CHUNK_SIZE
+from models import Metadata, Branch, Engine, EnginePart, Part, Quotation, QuotationItem
 
+VAT_RATE = 0.13
 
-def generate_quote_number():
+
+def format_quote_number(fmt, branch_code, year, seq, pad_width):
+    """Render a quote number; raises KeyError/ValueError/IndexError on a bad format."""
+    return fmt.format(branch=branch_code, year=year, seq=str(seq).zfill(pad_width))
+
+
+def validate_quote_format(fmt, pad_width):
+    """Return an error message for an unusable format/pad width, or None."""
+    if pad_width is not None and (not isinstance(pad_width, int) or not 1 <= pad_width <= 10):
+        return 'pad_width must be an integer between 1 and 10'
+    if fmt is None:
+        return None
+    if any(field not in fmt for field in ('{branch}', '{year}', '{seq}')):
+        # Without all three, two branches or two years could render the same number
+        return 'quote_format must contain {branch}, {year} and {seq}'
+    try:
+        number = format_quote_number(fmt, 'BR', 2025, 1, pad_width or Config.QUOTE_NUMBER_PAD)
+    except (KeyError, ValueError, IndexError):
+        return 'quote_format may only use the {branch}, {year} and {seq} placeholders'
+    if len(number) > 50:
+        return 'quote_format renders numbers longer than 50 characters'
+    return None
+
+
+def counter_key(branch_code, year):
+    """Metadata key of a branch's yearly counter.
+    The default branch keeps the original key so its series continues.
     """
-    Generate next quote number for the current year.
-    Format: QTN/TEST/YYYY/INC (INC zero-padded to 3 digits)
+    if branch_code == Config.DEFAULT_BRANCH:
+        return f'last_quote_increment_{year}'
+    return f'last_quote_increment_{branch_code}_{year}'
+
+
+def generate_quote_number(session=None, branch_code=None):
     """
-    session = get_db_session()
+    Generate next quote number of `branch_code` (default Config.DEFAULT_BRANCH)
+    for the current year, e.g. QTN/TEST/YYYY/INC (INC zero-padded to 3 digits).
+
+    Each branch has its own counter row, so branches never share a sequence.
+    When `session` is given the counter is bumped inside the caller's
+    transaction (so a failed create does not burn a number) and the caller
+    commits; otherwise a private session is used and committed here.
+    """
+    own_session = session is None
+    if own_session:
+        session = get_db_session()
+    branch_code = branch_code or Config.DEFAULT_BRANCH
     
     try:
         year = datetime.now().year
-        key = f'last_quote_increment_{year}'
-        
-        # Fetch or create metadata entry for this year
-        metadata = session.query(Metadata).filter_by(key=key).first()
+        key = counter_key(branch_code, year)
         
-        if metadata:
-            # Increment existing counter
-            current_inc = int(metadata.value)
-            new_inc = current_inc + 1
-            metadata.value = str(new_inc)
+        # Increment atomically so concurrent creates can't read the same value
+        updated = session.query(Metadata).filter_by(key=key).update(
+            {'value': cast(cast(Metadata.value, Integer) + 1, String)},
+            synchronize_session=False
+        )
+        if updated:
+            new_inc = int(session.query(Metadata.value).filter_by(key=key).scalar())
         else:
-            # First quote of the year
+            # First quote of the year for this branch
             new_inc = 1
-            metadata = Metadata(key=key, value='1')
-            session.add(metadata)
+            session.add(Metadata(key=key, value='1'))
+            session.flush()
+        
+        branch = session.query(Branch.quote_format, Branch.pad_width).filter_by(code=branch_code).first()
+        fmt = (branch and branch.quote_format) or Config.QUOTE_NUMBER_FORMAT
+        pad_width = (branch and branch.pad_width) or Config.QUOTE_NUMBER_PAD
         
-        session.commit()
+        if own_session:
+            session.commit()
         
-        # Format: QTN/TEST/2025/001
-        quote_no = f'QTN/TEST/{year}/{str(new_inc).zfill(3)}'
-        return quote_no
+        # Default format: QTN/TEST/2025/001
+        return format_quote_number(fmt, branch_code, year, new_inc, pad_width)
         
     except Exception as e:
-        session.rollback()
+        if own_session:
+            session.rollback()
         raise e
+    finally:
+        if own_session:
+            session.close()
+
+
+def branch_summaries(session):
+    """Branches with their effective format, pad width and this year's last sequence number."""
+    year = datetime.now().year
+    branches = session.query(Branch).order_by(Branch.code).all()
+    keys = {counter_key(b.code, year): b.code for b in branches}
+    counters = dict(
+        (keys[key], int(value)) for key, value in
+        session.query(Metadata.key, Metadata.value).filter(Metadata.key.in_(list(keys))).all()
+    ) if keys else {}
+    return [
+        {
+            'code': b.code,
+            'name': b.name,
+            'quote_format': b.quote_format or Config.QUOTE_NUMBER_FORMAT,
+            'pad_width': b.pad_width or Config.QUOTE_NUMBER_PAD,
+            'year': year,
+            'last_seq': counters.get(b.code, 0)
+        }
+        for b in branches
+    ]
+
+
+def compute_totals(subtotal, discount_percent):
+    """Apply discount first, then VAT (13%) on the discounted subtotal.
+    Returns (discount_amount, vat_amount, total), unrounded.
+    """
+    discount_amount = subtotal * ((discount_percent or 0.0) / 100.0)
+    discounted_subtotal = subtotal - discount_amount
+    vat_amount = discounted_subtotal * VAT_RATE
+    return discount_amount, vat_amount, discounted_subtotal + vat_amount
+
+
+def normalize_quotation_items(items):
+    """Validate and normalize quotation lines in a single pass.
+
+    Returns (lines, subtotal) where each line is a dict ready for insertion.
+    Raises ValueError with a client-facing message on the first bad line.
+    """
+    if not isinstance(items, list):
+        raise ValueError('items must be a list')
+    lines = []
+    subtotal = 0.0
+    for item in items:
+        try:
+            qty = float(item.get('qty', 0))
+            price = float(item.get('price', 0))
+        except Exception:
+            raise ValueError('invalid item qty/price')
+        if qty < 1 or price < 0:
+            raise ValueError('item qty must be >=1 and price >=0')
+        pid = item.get('part_id')
+        # Normalize None/empty
+        if pid in (None, '', 0):
+            pid = None
+        else:
+            try:
+                pid = int(pid)
+            except (TypeError, ValueError):
+                raise ValueError('invalid item part_id')
+        lines.append({
+            'part_id': pid,
+            'qty': qty,
+            'price': price,
+            'part_no': item.get('part_no'),
+            'part_name': item.get('part_name')
+        })
+        subtotal += qty * price
+    return lines, subtotal
+
+
+def verify_part_ids(session, part_ids):
+    """Check that every referenced part exists using IN lookups on the primary key.
+    Returns {part_id: (part_no, part_name)}; raises ValueError listing the unknown ids.
+    """
+    wanted = sorted(set(part_ids))
+    found = {}
+    for start in range(0, len(wanted), IN_CHUNK_SIZE):
+        chunk = wanted[start:start + IN_CHUNK_SIZE]
+        rows = session.query(Part.id, Part.part_no, Part.part_name).filter(Part.id.in_(chunk)).all()
+        found.update((pid, (part_no, part_name)) for pid, part_no, part_name in rows)
+    unknown = [pid for pid in wanted if pid not in found]
+    if unknown:
+        shown = ', '.join(str(pid) for pid in unknown[:20])
+        raise ValueError(f'unknown part_id(s): {shown}' + (' ...' if len(unknown) > 20 else ''))
+    return found
+
+
+def create_quotation_record(session, username, customer, address, lines, subtotal, discount_percent,
+                            quote_date=None, labour=0.0, branch_code=None):
+    """Insert a quotation and its line items using the caller's session.
+
+    `lines` and `subtotal` come from normalize_quotation_items. Raises
+    ValueError if a line references a part that does not exist. Returns the
+    creation summary dict; the caller commits (see services/write_queue.run_write).
+    The quote number comes from the series of `branch_code` (default branch if None).
+    """
+    branch_code = branch_code or Config.DEFAULT_BRANCH
+    parts = verify_part_ids(session, [line['part_id'] for line in lines if line['part_id'] is not None])
+    
+    # Generate quote number
+    quote_no = generate_quote_number(session, branch_code)
+    
+    discount_amount, vat_amount, total = compute_totals(subtotal, discount_percent)
+    
+    # Create quotation
+    quotation = Quotation(
+        quote_no=quote_no,
+        branch_code=branch_code,
+        customer=customer,
+        address=address,
+        date=quote_date or datetime.now(),
+        labour=labour,
+        discount_percent=discount_percent,
+        total=round(total, 2),
+        subtotal=round(subtotal, 2),
+        discount_amount=round(discount_amount, 2),
+        vat_amount=round(vat_amount, 2),
+        created_by=username
+    )
+    session.add(quotation)
+    session.flush()  # Get quotation ID
+    
+    # Add line items (support ad-hoc custom parts with part_no/part_name) as one executemany.
+    # Catalog lines store the part's current number and name, so later catalog
+    # edits do not change the quotation (or its cached detail payload).
+    rows = []
+    for line in lines:
+        row = dict(line, quotation_id=quotation.id)
+        if row['part_id'] is not None and not row['part_name']:
+            row['part_no'], row['part_name'] = parts[row['part_id']]
+        rows.append(row)
+    if rows:
+        session.bulk_insert_mappings(QuotationItem, rows, render_nulls=True)
+    
+    return {
+        'message': 'quotation created',
+        'quote_no': quote_no,
+        'id': quotation.id,
+        'total': quotation.total,
+        'subtotal': quotation.subtotal,
+        'vat': quotation.vat_amount,
+        'discount_amount': quotation.discount_amount
+    }
+
+
+def count_quotation_items(session, qid):
+    """Number of line items of a quotation (served from the quotation_id index)."""
+    return session.query(func.count(QuotationItem.id)).filter(QuotationItem.quotation_id == qid).scalar()
+
+
+def _quotation_header(session, quotation):
+    """Detail payload fields other than `items`."""
+    result = {
+        'id': quotation.id,
+        'quote_no': quotation.quote_no,
+        'customer': quotation.customer,
+        'address': quotation.address,
+        'date': quotation.date.strftime('%Y-%m-%d'),
+        # Labour is internal; still stored but not shown in UI by default
+        'labour': round(quotation.labour, 2),
+        'discount_percent': quotation.discount_percent,
+        'total': round(quotation.total, 2),
+        'created_by': quotation.created_by
+    }
+    if quotation.subtotal is not None:
+        subtotal = quotation.subtotal
+        discount_amount = quotation.discount_amount
+        vat_amount = quotation.vat_amount
+    else:
+        # Legacy row without stored totals: compute from the items
+        subtotal = session.query(func.sum(QuotationItem.qty * QuotationItem.price)).filter(
+            QuotationItem.quotation_id == quotation.id
+        ).scalar() or 0.0
+        discount_amount, vat_amount, _ = compute_totals(subtotal, quotation.discount_percent)
+    result['subtotal'] = round(subtotal, 2)
+    result['discount_amount'] = round(discount_amount, 2)
+    result['vat'] = round(vat_amount, 2)
+    return result
+
+
+def _item_dicts(session, items):
+    """Serialize line items. Lines store their part_no/part_name since creation;
+    only older lines without them fall back to the current catalog.
+    """
+    result = [
+        {
+            'part_id': i.part_id,
+            'part_no': i.part_no,
+            'part_name': i.part_name,
+            'qty': i.qty,
+            'price': round(i.price, 2)
+        }
+        for i in items
+    ]
+    missing = sorted({it['part_id'] for it in result if not it.get('part_name') and it.get('part_id')})
+    if missing:
+        parts = {}
+        for start in range(0, len(missing), IN_CHUNK_SIZE):
+            chunk = missing[start:start + IN_CHUNK_SIZE]
+            rows = session.query(Part.id, Part.part_no, Part.part_name).filter(Part.id.in_(chunk)).all()
+            parts.update((pid, (part_no, part_name)) for pid, part_no, part_name in rows)
+        for it in result:
+            p = parts.get(it['part_id']) if not it.get('part_name') else None
+            if p:
+                it['part_no'], it['part_name'] = p
+    return result
+
+
+def build_quotation_detail(session, qid):
+    """Build the detail payload for a quotation, or None if it does not exist."""
+    quotation = session.query(Quotation).filter_by(id=qid).first()
+    if not quotation:
+        return None
+    
+    result = _quotation_header(session, quotation)
+    items = session.query(QuotationItem).filter_by(quotation_id=qid).order_by(QuotationItem.id).all()
+    result['items'] = _item_dicts(session, items)
+    return result
+
+
+def iter_quotation_detail_json(qid, dumps, batch_size=500):
+    """Stream the detail payload of a (large) quotation as JSON text chunks.
+
+    Items are read in keyset-paginated batches, each in its own short
+    session, so no read transaction stays open while the client downloads.
+    Produces the same fields as build_quotation_detail.
+    """
+    session = get_db_session()
+    try:
+        quotation = session.query(Quotation).filter_by(id=qid).first()
+        header = _quotation_header(session, quotation)
     finally:
         session.close()
+    yield dumps(header)[:-1] + ', "items": ['
+    last_id = 0
+    first = True
+    while True:
+        session = get_db_session()
+        try:
+            items = session.query(QuotationItem).filter(
+                QuotationItem.quotation_id == qid, QuotationItem.id > last_id
+            ).order_by(QuotationItem.id).limit(batch_size).all()
+            if not items:
+                break
+            last_id = items[-1].id
+            chunk = ', '.join(dumps(it) for it in _item_dicts(session, items))
+        finally:
+            session.close()
+        yield chunk if first else ', ' + chunk
+        first = False
+    yield ']}'
 
 
 def get_categories():
@@ -0,0 +1,152 @@
+"""
+Bulk staff import, run as an 'import_users' background job
+(POST /api/auth/users/bulk enqueues it; see services/job_handlers.py).
+
+Rows are validated first, and usernames that already exist are skipped
+before any password is hashed. The remaining initial passwords are hashed
+on a thread pool; hashlib's scrypt and pbkdf2 release the GIL, so the hashes
+run in parallel. Users are then inserted USER_IMPORT_CHUNK at a time, one
+transaction per chunk through run_write, so an import never holds the write
+lock for long and a failed chunk does not undo the chunks before it.
+"""
+import time
+from concurrent.futures import ThreadPoolExecutor
+from werkzeug.security import generate_password_hash
+from config import Config
+from database import get_db_session, IN_CHUNK_SIZE
+from models import User, Branch
+from services.write_queue import run_write
+
+VALID_ROLES = ('admin', 'staff')
+
+
+def _result(row, username, status, error=None):
+    result = {'row': row, 'username': username, 'status': status}
+    if error:
+        result['error'] = error
+    return result
+
+
+def _validate(rows):
+    """Split rows into (pending users, results with errors filled in)."""
+    results = [None] * len(rows)
+    pending = []
+    seen = set()
+    for i, row in enumerate(rows):
+        if not isinstance(row, dict):
+            results[i] = _result(i, None, 'invalid', 'row must be an object')
+            continue
+        username = str(row.get('username') or '').strip()
+        password = row.get('password')
+        role = row.get('role') or 'staff'
+        branch = row.get('branch') or Config.DEFAULT_BRANCH
+        if not username or len(username) > 50:
+            error = 'username required (at most 50 characters)'
+        elif not isinstance(password, str) or not password:
+            error = 'password required'
+        elif role not in VALID_ROLES:
+            error = f"role must be one of: {', '.join(VALID_ROLES)}"
+        elif username in seen:
+            error = 'duplicate username in this import'
+        else:
+            error = None
+        if error:
+            results[i] = _result(i, username or None, 'invalid', error)
+            continue
+        seen.add(username)
+        pending.append({'row': i, 'username': username, 'password': password, 'role': role, 'branch': branch})
+    return pending, results
+
+
+def _existing_usernames(db, usernames):
+    existing = set()
+    for start in range(0, len(usernames), IN_CHUNK_SIZE):
+        chunk = usernames[start:start + IN_CHUNK_SIZE]
+        existing.update(name for (name,) in db.query(User.username).filter(User.username.in_(chunk)).all())
+    return existing
+
+
+def import_users(rows, progress=None):
+    """Create users from `rows` ({username, password, role?, branch?} dicts).
+
+    Returns a summary with one result per input row (status 'created',
+    'exists', 'invalid' or 'error') plus counts and timings.
+    `progress(percent, message)` is called after every hash and every chunk.
+    """
+    started = time.perf_counter()
+    pending, results = _validate(rows)
+
+    # Skip rows that cannot be inserted before paying for their hashes
+    db = get_db_session()
+    try:
+        existing = _existing_usernames(db, [p['username'] for p in pending])
+        branches = {code for (code,) in db.query(Branch.code).all()} | {Config.DEFAULT_BRANCH}
+    finally:
+        db.close()
+    to_create = []
+    for p in pending:
+        if p['username'] in existing:
+            results[p['row']] = _result(p['row'], p['username'], 'exists', 'username already exists')
+        elif p['branch'] not in branches:
+            results[p['row']] = _result(p['row'], p['username'], 'invalid', f"unknown branch: {p['branch']}")
+        else:
+            to_create.append(p)
+
+    hash_started = time.perf_counter()
+    if to_create:
+        with ThreadPoolExecutor(max_workers=Config.USER_IMPORT_HASH_WORKERS) as pool:
+            hashes = pool.map(generate_password_hash, [p['password'] for p in to_create])
+            for n, (p, password_hash) in enumerate(zip(to_create, hashes), 1):
+                p['password_hash'] = password_hash
+                if progress:
+                    progress(90.0 * n / len(to_create), f'hashed {n}/{len(to_create)} passwords')
+    hash_seconds = time.perf_counter() - hash_started
+
+    insert_started = time.perf_counter()
+    for start in range(0, len(to_create), Config.USER_IMPORT_CHUNK):
+        chunk = to_create[start:start + Config.USER_IMPORT_CHUNK]
+
+        def write(db, chunk=chunk):
+            # Re-check inside the transaction: another admin may have added some meanwhile
+            taken = _existing_usernames(db, [p['username'] for p in chunk])
+            new = [p for p in chunk if p['username'] not in taken]
+            if new:
+                db.bulk_insert_mappings(User, [
+                    {'username': p['username'], 'password_hash': p['password_hash'], 'role': p['role'],
+                     'branch_code': p['branch']}
+                    for p in new
+                ])
+            return taken
+
+        try:
+            taken = run_write(write)
+        except Exception as e:
+            for p in chunk:
+                results[p['row']] = _result(p['row'], p['username'], 'error', str(e))
+        else:
+            for p in chunk:
+                if p['username'] in taken:
+                    results[p['row']] = _result(p['row'], p['username'], 'exists', 'username already exists')
+                else:
+                    results[p['row']] = _result(p['row'], p['username'], 'created')
+        if progress:
+            done = start + len(chunk)
+            progress(90.0 + 10.0 * done / len(to_create), f'inserted {done}/{len(to_create)} users')
+    insert_seconds = time.perf_counter() - insert_started
+
+    seconds = time.perf_counter() - started
+    counts = {status: 0 for status in ('created', 'exists', 'invalid', 'error')}
+    for result in results:
+        counts[result['status']] += 1
+    return {
+        'rows': len(rows),
+        'created': counts['created'],
+        'exists': counts['exists'],
+        'invalid': counts['invalid'],
+        'failed': counts['error'],
+        'seconds': round(seconds, 3),
+        'hash_seconds': round(hash_seconds, 3),
+        'insert_seconds': round(insert_seconds, 3),
+        'users_per_second': round(counts['created'] / seconds, 1) if seconds > 0 else None,
+        'results': results
+    }
@@ -0,0 +1,126 @@
+"""
+Write path with optional group commit.
+
+Routes express a write as a function of a session and hand it to
+`run_write`. By default the function runs in its own session and commits
+alone. With `SINGLE_WRITER_MODE` enabled, writes are queued to one writer
+thread which runs every request that arrives within `GROUP_COMMIT_WINDOW_MS`
+inside one transaction (each under its own SAVEPOINT) and commits them
+together. Callers still get their own result or exception back.
+
+Write functions must return plain data (not ORM objects) and should do
+expensive CPU work such as password hashing before calling `run_write`.
+"""
+import queue
+import threading
+import time
+from database import get_write_session
+from config import Config
+
+
+class _WriteRequest:
+    __slots__ = ('fn', 'result', 'error', 'done')
+
+    def __init__(self, fn):
+        self.fn = fn
+        self.result = None
+        self.error = None
+        self.done = threading.Event()
+
+
+class GroupCommitWriter:
+    """Single writer thread that batches write requests into group commits."""
+
+    def __init__(self, window_ms=None, max_batch=None):
+        self.window = (window_ms if window_ms is not None else Config.GROUP_COMMIT_WINDOW_MS) / 1000.0
+        self.max_batch = max_batch or Config.GROUP_COMMIT_MAX_BATCH
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._stats = {'batches': 0, 'requests': 0, 'errors': 0, 'largest_batch': 0}
+        self._thread = threading.Thread(target=self._run, name='group-commit-writer', daemon=True)
+        self._thread.start()
+
+    def submit(self, fn):
+        """Queue `fn(session)` and block until its batch has committed."""
+        req = _WriteRequest(fn)
+        self._queue.put(req)
+        req.done.wait()
+        if req.error is not None:
+            raise req.error
+        return req.result
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+        stats['avg_batch'] = round(stats['requests'] / stats['batches'], 2) if stats['batches'] else 0.0
+        return stats
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.window
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                try:
+                    batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            self._commit_batch(batch)
+
+    def _commit_batch(self, batch):
+        session = get_write_session()
+        try:
+            for req in batch:
+                savepoint = session.begin_nested()
+                try:
+                    req.result = req.fn(session)
+                    savepoint.commit()
+                except Exception as e:
+                    savepoint.rollback()
+                    req.error = e
+            session.commit()
+        except Exception as e:
+            # The group commit itself failed: every request in the batch is lost.
+            session.rollback()
+            for req in batch:
+                if req.error is None:
+                    req.result, req.error = None, e
+        finally:
+            session.close()
+            with self._lock:
+                self._stats['batches'] += 1
+                self._stats['requests'] += len(batch)
+                self._stats['errors'] += sum(1 for req in batch if req.error is not None)
+                self._stats['largest_batch'] = max(self._stats['largest_batch'], len(batch))
+            for req in batch:
+                req.done.set()
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def get_writer():
+    """Return the process-wide writer, starting its thread on first use."""
+    global _writer
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                _writer = GroupCommitWriter()
+    return _writer
+
+
+def run_write(fn):
+    """Run `fn(session)` as a write and return its result once committed."""
+    if Config.SINGLE_WRITER_MODE:
+        return get_writer().submit(fn)
+    session = get_write_session()
+    try:
+        result = fn(session)
+        session.commit()
+        return result
+    except Exception:
+        session.rollback()
+        raise
+    finally:
+        session.close()
@@ -0,0 +1,62 @@
+"""
+Background job worker pool.
+Start alongside the Flask app to process jobs from the `jobs` table:
+    .\venv\Scripts\python.exe worker.py
+    .\venv\Scripts\python.exe worker.py --processes 4
+Jobs left running by a crashed or stopped worker are re-queued once their lease expires;
+a worker process that dies is restarted.
+"""
+import argparse
+import multiprocessing
+import signal
+import time
+from config import Config
+from database import init_db
+
+
+def _worker_main(stop_event):
+    # Ctrl+C is handled by the parent, which stops workers between jobs.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    import services.job_handlers  # noqa: F401  (registers handlers)
+    from services.job_queue import run_worker
+    run_worker(stop_event)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run background job workers.')
+    parser.add_argument('--processes', type=int, default=Config.JOB_WORKER_PROCESSES)
+    args = parser.parse_args()
+
+    init_db()
+    stop_event = multiprocessing.Event()
+
+    def start_worker(i):
+        p = multiprocessing.Process(target=_worker_main, args=(stop_event,), name=f'job-worker-{i}')
+        p.start()
+        return p
+
+    procs = [start_worker(i) for i in range(max(1, args.processes))]
+    print(f"✓ Started {len(procs)} job worker(s); press Ctrl+C to stop")
+
+    # The handler only sets a flag: stop_event's lock is not re-entrant
+    stopping = []
+
+    def shutdown(*_):
+        stopping.append(True)
+    signal.signal(signal.SIGTERM, shutdown)
+    try:
+        while not stopping:
+            for i, p in enumerate(procs):
+                if not p.is_alive() and not stopping:
+                    print(f"✗ {p.name} exited with code {p.exitcode}; restarting")
+                    procs[i] = start_worker(i)
+            time.sleep(1.0)
+    except KeyboardInterrupt:
+        print("Stopping workers after their current job...")
+    stop_event.set()
+    for p in procs:
+        p.join()
+
+
+if __name__ == '__main__':
+    main()
@@ -9,6 +9,34 @@ function StaffManagement() {
   const [newUsername, setNewUsername] = useState('')
   const [newPassword, setNewPassword] = useState('')
   const [newRole, setNewRole] = useState('staff')
+  const [roleFilter, setRoleFilter] = useState('')
+  const [search, setSearch] = useState('')
+  const [total, setTotal] = useState(0)
+  const [nextAfter, setNextAfter] = useState(null)
+  const [bulkText, setBulkText] = useState('')
+  const [bulkResult, setBulkResult] = useState(null)
+  const [bulkStatus, setBulkStatus] = useState(null)
+
+  async function loadUsers(after = null) {
+    const params = new URLSearchParams({ per_page: '50' })
+    if (roleFilter) params.set('role', roleFilter)
+    if (search) params.set('q', search)
+    if (after) params.set('after', after)
+    setLoading(true)
+    try {
+      const res = await fetch(`/api/auth/users?${params}`, { credentials: 'include' })
+      const data = await res.json()
+      if (data.error) return setError(data.error)
+      setUsers(after ? prev => [...prev, ...(data.users || [])] : (data.users || []))
+      setTotal(data.total || 0)
+      setNextAfter(data.next_after || null)
+    } catch (e) {
+      console.error(e)
+      setError('Failed to load users')
+    } finally {
+      setLoading(false)
+    }
+  }
 
   useEffect(() => {
     const fetchMeAndUsers = async () => {
@@ -24,21 +52,51 @@ function StaffManagement() {
           setError('Only admin can manage staff')
           return
         }
-        setLoading(true)
-        const res = await fetch('/api/auth/users', { credentials: 'include' })
-        const data = await res.json()
-        if (data.error) setError(data.error)
-        else setUsers(data.users || [])
+        await loadUsers()
       } catch (e) {
         console.error(e)
         setError('Failed to load users')
-      } finally {
-        setLoading(false)
       }
     }
     fetchMeAndUsers()
   }, [])
 
+  async function bulkImport() {
+    setError(null)
+    setBulkResult(null)
+    // One user per line: username,password[,role[,branch]]
+    const rows = bulkText.split('\n').map(l => l.trim()).filter(Boolean).map(l => {
+      const [username, password, role, branch] = l.split(',').map(x => x.trim())
+      return { username, password, role: role || 'staff', branch: branch || undefined }
+    })
+    if (!rows.length) return setError('Enter one user per line: username,password[,role[,branch]]')
+    try {
+      const res = await fetch('/api/auth/users/bulk', { method: 'POST', credentials: 'include', headers: {'Content-Type': 'application/json'}, body: JSON.stringify({ users: rows }) })
+      const data = await res.json()
+      if (!res.ok) return setError(data.error || 'Import failed')
+      // The import runs as a background job: poll it until it finishes
+      let job = data
+      while (job.status === 'queued' || job.status === 'running') {
+        setBulkStatus(job.message || `Importing ${data.rows} users...`)
+        await new Promise(resolve => setTimeout(resolve, 1000))
+        const jobRes = await fetch(data.status_url, { credentials: 'include' })
+        job = await jobRes.json()
+        if (!jobRes.ok) return setError(job.error || 'Import failed')
+      }
+      if (job.status !== 'done') return setError('Import failed')
+      setBulkResult(job.result)
+      if (job.result.created) {
+        setBulkText('')
+        loadUsers()
+      }
+    } catch (e) {
+      console.error(e)
+      setError('Network error')
+    } finally {
+      setBulkStatus(null)
+    }
+  }
+
   async function createUser() {
     setError(null)
     if (!newUsername || !newPassword) return setError('username and password required')
@@ -47,6 +105,7 @@ function StaffManagement() {
       const data = await res.json()
       if (!res.ok) return setError(data.error || 'Failed to create user')
       setUsers([...users, { username: newUsername, role: newRole }])
+      setTotal(total + 1)
       setNewUsername('')
       setNewPassword('')
     } catch (e) {
@@ -62,6 +121,7 @@ function StaffManagement() {
       const data = await res.json()
       if (!res.ok) return setError(data.error || 'Failed to delete')
       setUsers(users.filter(x => x.username !== u))
+      setTotal(total - 1)
     } catch (e) {
       console.error(e)
       setError('Network error')
@@ -103,16 +163,45 @@ function StaffManagement() {
           </div>
         </div>
 
+        <div className="card p-3 mb-3" style={{ maxWidth: 700 }}>
+          <h5>Bulk Import</h5>
+          <textarea className="form-control mb-2" rows={5} placeholder="username,password[,role[,branch]] — one per line" value={bulkText} onChange={e => setBulkText(e.target.value)} />
+          <div><button className="btn btn-primary" onClick={bulkImport} disabled={!!bulkStatus}>Import</button></div>
+          {bulkStatus && <p className="mt-2 mb-0 small">{bulkStatus}</p>}
+          {bulkResult && (
+            <div className="mt-2">
+              <p className="mb-1">Created {bulkResult.created} of {bulkResult.rows} ({bulkResult.exists} existing, {bulkResult.invalid} invalid, {bulkResult.failed} failed) in {bulkResult.seconds}s</p>
+              <ul className="small mb-0">
+                {bulkResult.results.filter(r => r.status !== 'created').map(r => (
+                  <li key={r.row}>Line {r.row + 1}{r.username ? ` (${r.username})` : ''}: {r.error}</li>
+                ))}
+              </ul>
+            </div>
+          )}
+        </div>
+
         <div className="card p-3" style={{ maxWidth: 700 }}>
-          <h5>Staff List</h5>
-          {loading ? <p>Loading...</p> : (
+          <h5>Staff List ({total})</h5>
+          <div className="row g-2 mb-2">
+            <div className="col-md-5"><input className="form-control" placeholder="username starts with" value={search} onChange={e => setSearch(e.target.value)} /></div>
+            <div className="col-md-4">
+              <select className="form-select" value={roleFilter} onChange={e => setRoleFilter(e.target.value)}>
+                <option value="">all roles</option>
+                <option value="staff">staff</option>
+                <option value="admin">admin</option>
+              </select>
+            </div>
+            <div className="col-md-3"><button className="btn btn-secondary" onClick={() => loadUsers()}>Filter</button></div>
+          </div>
+          {loading && !users.length ? <p>Loading...</p> : (
             <table className="table">
-              <thead><tr><th>Username</th><th>Role</th><th>Actions</th></tr></thead>
+              <thead><tr><th>Username</th><th>Role</th><th>Branch</th><th>Actions</th></tr></thead>
               <tbody>
                 {users.map(u => (
                   <tr key={u.username}>
                     <td>{u.username}</td>
                     <td>{u.role}</td>
+                    <td>{u.branch}</td>
                     <td>
                       <button className="btn btn-sm btn-secondary me-2" onClick={() => setPassword(u.username)}>Set Password</button>
                       <button className="btn btn-sm btn-danger" onClick={() => deleteUser(u.username)}>Delete</button>
@@ -122,6 +211,7 @@ function StaffManagement() {
               </tbody>
             </table>
           )}
+          {nextAfter && <button className="btn btn-outline-secondary" disabled={loading} onClick={() => loadUsers(nextAfter)}>Load more</button>}
         </div>
       </div>
     </div>